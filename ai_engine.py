@@ -1,8 +1,15 @@
 # ai_engine.py
 
 import time
+from array import array
 
 from customboard import CustomBoard
+from customboard.moves import mvv_lva_score
+from customboard.move_encoding import (
+    decode_move, move_to_sq,
+    MOVE_SQUARES_MASK, MOVE_TO_SHIFT,
+    MOVE_FLAG_CAPTURE, MOVE_FLAG_BISON_PUSH, MOVE_FLAG_PROMOTION
+)
 from piece_movement.piece_movement_common import (
     EMPTY,
     WHITE_PAWN, BLACK_PAWN,
@@ -13,8 +20,7 @@ from piece_movement.piece_movement_common import (
 # SENZA importare get_position_noise né altro
 from evaluation import (
     static_evaluation,
-    evaluation_breakdown,
-    PIECE_VALUE
+    evaluation_breakdown
 )
 
 DEBUG_MODE = False
@@ -25,11 +31,24 @@ DEBUG_MODE = False
 
 USE_MOVE_ORDERING = True
 USE_TRANSPOSITION = True
-MAX_DEPTH_TT = 128
+MAX_DEPTH_TT = 128      # profondità massima registrata (il campo è di un byte)
+TT_SIZE_MB = 16         # memoria della transposition table
+TT_BUCKET_SIZE = 2      # voce a profondità preferita + voce sempre sostituita
 
 USE_NULL_MOVE = True
 NULL_MOVE_REDUCTION = 1
 
+USE_KILLER_MOVES = True
+USE_HISTORY = True
+USE_COUNTER_MOVES = True
+
+USE_PVS = True
+PVS_WINDOW = 0.01       # ampiezza della finestra "nulla" (i punteggi sono float)
+
+USE_IID = True
+IID_MIN_DEPTH = 3
+IID_REDUCTION = 2
+
 USE_QUIESCENCE = True
 QUIESCENCE_MAX_DEPTH = 4
 
@@ -44,7 +63,101 @@ EXACT = 0
 LOWER_BOUND = 1
 UPPER_BOUND = 2
 
-TRANSPOSITION_TABLE = {}
+# Byte occupati da una voce: verifica (4) + punteggio (8) + profondità (1)
+# + bound (1) + mossa (2) + generazione (1)
+TT_ENTRY_BYTES = 17
+
+class TranspositionTable:
+    """
+    Transposition table a dimensione fissa, in array preallocati.
+    Il numero di bucket è la potenza di 2 che sta in TT_SIZE_MB: il
+    bucket si ricava dai bit bassi della chiave Zobrist e i 32 bit alti si
+    salvano come verifica. Ogni bucket ha TT_BUCKET_SIZE voci: la prima si
+    sostituisce solo con una ricerca almeno altrettanto profonda, con la
+    stessa posizione o se appartiene a una ricerca precedente (generazione
+    diversa); le altre sempre, preferendo quelle vecchie.
+    La tabella resta valida tra una mossa e l'altra della stessa partita.
+    Per ogni voce si salva solo la mossa migliore codificata (0 = nessuna),
+    non l'intera variante. Profondità 0 indica una voce vuota.
+    """
+
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        max_buckets = max(1, (size_mb << 20) // (TT_ENTRY_BYTES * TT_BUCKET_SIZE))
+        n_buckets = 1 << (max_buckets.bit_length() - 1)
+        self.bucket_mask = n_buckets - 1
+        self.size = n_buckets * TT_BUCKET_SIZE
+        self.clear()
+
+    def clear(self):
+        n = self.size
+        self.checks = array('I', bytes(4 * n))
+        self.scores = array('d', bytes(8 * n))
+        self.depths = array('B', bytes(n))
+        self.bounds = array('B', bytes(n))
+        self.moves = array('H', bytes(2 * n))
+        self.generations = array('B', bytes(n))
+        self.generation = 0
+
+    def probe(self, key):
+        """
+        Ritorna (depth, score, bound, move) per la chiave, oppure None.
+        """
+        check = key >> 32
+        base = (key & self.bucket_mask) * TT_BUCKET_SIZE
+        depths = self.depths
+        checks = self.checks
+        for i in range(base, base + TT_BUCKET_SIZE):
+            if depths[i] and checks[i] == check:
+                return (depths[i], self.scores[i], self.bounds[i], self.moves[i])
+        return None
+
+    def new_search(self):
+        """
+        Da chiamare all'inizio di ogni ricerca dalla radice: le voci scritte
+        nelle ricerche precedenti restano consultabili, ma diventano le prime
+        a essere sostituite.
+        """
+        self.generation = (self.generation + 1) & 0xFF
+
+    def store(self, key, depth, score, bound, move):
+        check = key >> 32
+        base = (key & self.bucket_mask) * TT_BUCKET_SIZE
+        depths = self.depths
+        checks = self.checks
+        generations = self.generations
+        generation = self.generation
+        if depth > MAX_DEPTH_TT:
+            depth = MAX_DEPTH_TT
+        # Voce a profondità preferita: stessa posizione, voce di una ricerca
+        # precedente o ricerca non meno profonda
+        slot = base
+        if (depths[base] and checks[base] != check
+                and generations[base] == generation and depth < depths[base]):
+            # Voci sempre sostituite: stessa posizione o vuota, poi la più vecchia
+            slot = base + TT_BUCKET_SIZE - 1
+            for i in range(base + 1, base + TT_BUCKET_SIZE):
+                if checks[i] == check or not depths[i]:
+                    slot = i
+                    break
+                if generations[i] != generation:
+                    slot = i
+        checks[slot] = check
+        self.scores[slot] = score
+        depths[slot] = depth
+        self.bounds[slot] = bound
+        self.moves[slot] = move
+        generations[slot] = generation
+
+    def usage(self):
+        """
+        Frazione di voci occupate (per il debug).
+        """
+        return (self.size - self.depths.count(0)) / self.size
+
+TRANSPOSITION_TABLE = TranspositionTable(TT_SIZE_MB)
 
 ###############################################################################
 # COUNTERS PER DEBUG
@@ -73,114 +186,192 @@ def print_debug_counters(prefix=""):
 
 def board_position_hash(board_obj):
     """
-    Calcola un hash di stringa per la transposition table, 
-    identico a evaluation.board_position_hash ma duplicato qui 
-    per evitare import circolari.
+    Chiave della posizione per la transposition table: è la chiave Zobrist
+    a 64 bit mantenuta in modo incrementale dal CustomBoard (pezzi, turno,
+    diritti di arrocco e poteri ereditati dei Totem).
     """
-    rows = []
-    for r in range(8):
-        row_pieces = []
-        for c in range(8):
-            row_pieces.append(str(board_obj.board[r][c]))
-        rows.append(",".join(row_pieces))
-    turn_char = "W" if board_obj.turn_white else "B"
-    return f"{'/'.join(rows)} {turn_char}"
-
-def mvv_lva_score(board_obj: CustomBoard, move):
-    (fr, fc, tr, tc) = move
-    attacker = board_obj.board[fr][fc]
-    victim = board_obj.board[tr][tc]
-    if victim == EMPTY or victim == attacker:
-        return -1
-    val_victim = PIECE_VALUE.get(victim, 0)
-    val_attacker = PIECE_VALUE.get(attacker, 0)
-    return 100 * val_victim - val_attacker
+    return board_obj.zobrist_key
 
 def order_moves(board_obj: CustomBoard, moves: list, pv_move=None) -> list:
     if not USE_MOVE_ORDERING:
         return moves
 
-    if pv_move and pv_move in moves:
+    # Catture in ordine MVV-LVA, poi le mosse tranquille per killer/history
+    quiet_key = quiet_move_key(board_obj, 0, 0)
+    def key(mv):
+        return (mvv_lva_score(board_obj, mv), quiet_key(mv))
+
+    if pv_move is not None and pv_move in moves:
         sorted_rest = sorted(
             [m for m in moves if m != pv_move],
-            key=lambda mv: mvv_lva_score(board_obj, mv),
+            key=key,
             reverse=True
         )
         return [pv_move] + sorted_rest
     else:
         return sorted(
             moves,
-            key=lambda mv: mvv_lva_score(board_obj, mv),
+            key=key,
             reverse=True
         )
 
+###############################################################################
+# BUFFER DELLE MOSSE
+###############################################################################
+
+# Le mosse sono interi codificati (customboard/move_encoding.py). Le liste
+# generate dalla ricerca stanno in array('H') preallocati, uno per livello di
+# quiescence più uno per la radice, riutilizzati a ogni nodo.
+ROOT_MOVES_BUFFER = array('H')
+QUIESCENCE_BUFFERS = [array('H') for _ in range(QUIESCENCE_MAX_DEPTH + 1)]
+
+###############################################################################
+# KILLER, HISTORY E COUNTER-MOVE (ordinamento delle mosse tranquille)
+###############################################################################
+
+# Le tabelle usano le caselle della mossa (bit 0-11, senza flag) e sono
+# indicizzate per pezzo * 64 + casella d'arrivo, così valgono allo stesso
+# modo per i pezzi classici e per quelli nativi (Bisonte, Sciamano, Totem).
+MAX_PLY = 64
+HISTORY_MAX = 1 << 20
+KILLER_SCORE = 1 << 22
+COUNTER_MOVE_SCORE = 1 << 21
+N_PIECE_SQUARES = 19 * 64
+
+KILLER_MOVES = [[0, 0] for _ in range(MAX_PLY)]
+HISTORY_TABLE = array('l', [0]) * N_PIECE_SQUARES
+COUNTER_MOVES = array('H', [0]) * N_PIECE_SQUARES
+
+def is_quiet_move(move):
+    """
+    Mossa che non cambia il materiale: niente cattura (la spinta del Bisonte
+    sposta il pedone senza catturarlo) e niente promozione.
+    """
+    if move & MOVE_FLAG_PROMOTION:
+        return False
+    return not move & MOVE_FLAG_CAPTURE or bool(move & MOVE_FLAG_BISON_PUSH)
+
+def age_move_heuristics():
+    """
+    A ogni nuova ricerca dalla radice: i killer valgono per la posizione
+    appena cercata e si azzerano, la history si dimezza.
+    """
+    for killers in KILLER_MOVES:
+        killers[0] = killers[1] = 0
+    for i in range(N_PIECE_SQUARES):
+        HISTORY_TABLE[i] >>= 1
+
+def clear_move_heuristics():
+    age_move_heuristics()
+    for i in range(N_PIECE_SQUARES):
+        HISTORY_TABLE[i] = 0
+        COUNTER_MOVES[i] = 0
+
+def _counter_index(board_obj, prev_move):
+    # Pezzo che ha appena mosso (già sulla casella d'arrivo) e casella d'arrivo
+    prev_to = (prev_move >> MOVE_TO_SHIFT) & 0x3F
+    return board_obj.board[prev_to >> 3][prev_to & 7] * 64 + prev_to
+
+def quiet_move_key(board_obj: CustomBoard, ply: int, prev_move: int):
+    """
+    Funzione di punteggio per le mosse tranquille del nodo: killer del ply,
+    poi la contromossa della mossa precedente, poi la history.
+    """
+    bstate = board_obj.board
+    killer_1 = killer_2 = counter = -1
+    if USE_KILLER_MOVES and ply < MAX_PLY:
+        (killer_1, killer_2) = KILLER_MOVES[ply]
+    if USE_COUNTER_MOVES and prev_move:
+        counter = COUNTER_MOVES[_counter_index(board_obj, prev_move)] or -1
+    history = HISTORY_TABLE if USE_HISTORY else None
+
+    def key(move):
+        squares = move & MOVE_SQUARES_MASK
+        if squares == killer_1:
+            return KILLER_SCORE + 1
+        if squares == killer_2:
+            return KILLER_SCORE
+        if squares == counter:
+            return COUNTER_MOVE_SCORE
+        if history is None:
+            return 0
+        frm = squares & 0x3F
+        return history[bstate[frm >> 3][frm & 7] * 64 + (squares >> MOVE_TO_SHIFT)]
+    return key
+
+def record_quiet_cutoff(board_obj: CustomBoard, move: int, depth: int, ply: int, prev_move: int):
+    """
+    Aggiorna killer, history e contromossa dopo un taglio beta prodotto dalla
+    mossa tranquilla 'move' (a mossa già annullata).
+    """
+    squares = move & MOVE_SQUARES_MASK
+    if USE_KILLER_MOVES and ply < MAX_PLY:
+        killers = KILLER_MOVES[ply]
+        if killers[0] != squares:
+            killers[1] = killers[0]
+            killers[0] = squares
+    if USE_HISTORY:
+        frm = squares & 0x3F
+        idx = board_obj.board[frm >> 3][frm & 7] * 64 + (squares >> MOVE_TO_SHIFT)
+        HISTORY_TABLE[idx] += depth * depth
+        if HISTORY_TABLE[idx] > HISTORY_MAX:
+            for i in range(N_PIECE_SQUARES):
+                HISTORY_TABLE[i] >>= 1
+    if USE_COUNTER_MOVES and prev_move:
+        COUNTER_MOVES[_counter_index(board_obj, prev_move)] = squares
+
 ###############################################################################
 # QUIESCENCE
 ###############################################################################
 
 def quiescence_search(board_obj: CustomBoard, alpha: float, beta: float, depth_q: int = 0) -> float:
+    """
+    Ricerca delle sole catture (negamax, fail-soft): il punteggio è dal punto
+    di vista del colore di turno e può cadere fuori da (alpha, beta).
+    """
     global prunes_count
+    color = 1 if board_obj.turn_white else -1
     if depth_q > QUIESCENCE_MAX_DEPTH or board_obj.is_game_over():
-        return static_evaluation(board_obj)
-
-    stand_pat = static_evaluation(board_obj)
-    if board_obj.turn_white:
-        if stand_pat >= beta:
-            return beta
-        if stand_pat > alpha:
-            alpha = stand_pat
-    else:
-        if stand_pat <= alpha:
-            return alpha
-        if stand_pat < beta:
-            beta = stand_pat
-
-    moves = board_obj.get_all_legal_moves(board_obj.turn_white)
-    captures = []
-    for mv in moves:
-        (fr, fc, tr, tc) = mv
-        occupant = board_obj.board[tr][tc]
-        mover = board_obj.board[fr][fc]
-        if occupant != EMPTY and occupant != mover:
-            captures.append(mv)
-
-    captures = order_moves(board_obj, captures, pv_move=None)
-
-    if board_obj.turn_white:
-        for mv in captures:
-            (fr, fc, tr, tc) = mv
-            move_info = board_obj.make_move_in_place(fr, fc, tr, tc)
-            if not move_info["move_done"]:
-                continue
-            val = quiescence_search(board_obj, alpha, beta, depth_q + 1)
-            board_obj.undo_move_in_place(move_info)
+        return color * static_evaluation(board_obj)
+
+    stand_pat = color * static_evaluation(board_obj)
+    if stand_pat >= beta:
+        return stand_pat
+    best = stand_pat
+    if stand_pat > alpha:
+        alpha = stand_pat
+
+    # Solo catture legali, già in ordine MVV-LVA
+    captures = board_obj.get_legal_captures(board_obj.turn_white, QUIESCENCE_BUFFERS[depth_q])
+
+    for mv in captures:
+        move_info = board_obj.make_encoded_move(mv)
+        if not move_info.move_done:
+            continue
+        val = -quiescence_search(board_obj, -beta, -alpha, depth_q + 1)
+        board_obj.undo_move_in_place(move_info)
+        if val > best:
+            best = val
             if val > alpha:
                 alpha = val
-            if alpha >= beta:
-                prunes_count += 1
-                return beta
-        return alpha
-    else:
-        for mv in captures:
-            (fr, fc, tr, tc) = mv
-            move_info = board_obj.make_move_in_place(fr, fc, tr, tc)
-            if not move_info["move_done"]:
-                continue
-            val = quiescence_search(board_obj, alpha, beta, depth_q + 1)
-            board_obj.undo_move_in_place(move_info)
-            if val < beta:
-                beta = val
-            if beta <= alpha:
-                prunes_count += 1
-                return alpha
-        return beta
+                if alpha >= beta:
+                    prunes_count += 1
+                    return best
+    return best
 
 ###############################################################################
-# MINIMAX + ALPHA-BETA
+# NEGAMAX + PVS (PRINCIPAL VARIATION SEARCH)
 ###############################################################################
 
-def minimax_alpha_beta(board_obj: CustomBoard, depth: int, alpha: float, beta: float,
-                       last_was_capture: bool=False, pv_move=None):
+def pvs_search(board_obj: CustomBoard, depth: int, alpha: float, beta: float,
+               last_was_capture: bool=False, ply: int=1, prev_move: int=0):
+    """
+    Negamax con alpha-beta: ritorna (punteggio, variante) con il punteggio dal
+    punto di vista del colore di turno. La prima mossa si cerca con la finestra
+    piena, le altre con una finestra nulla (alpha, alpha + PVS_WINDOW) e si
+    ricercano per intero solo se la superano. I valori sono fail-soft, così
+    i bound salvati nella TT dalle finestre nulle restano utili.
+    """
     global expansions_count, prunes_count, tt_hits_count
     expansions_count += 1
 
@@ -193,15 +384,20 @@ def minimax_alpha_beta(board_obj: CustomBoard, depth: int, alpha: float, beta: f
             return (val_q, [])
         else:
             val = static_evaluation(board_obj)
-            return (val, [])
+            return (val if board_obj.turn_white else -val, [])
 
     pos_hash = None
+    tt_move = None
     if USE_TRANSPOSITION:
         pos_hash = board_position_hash(board_obj)
-        if pos_hash in TRANSPOSITION_TABLE:
-            (stored_depth, stored_score, stored_bound, stored_line) = TRANSPOSITION_TABLE[pos_hash]
+        entry = TRANSPOSITION_TABLE.probe(pos_hash)
+        if entry is not None:
+            (stored_depth, stored_score, stored_bound, stored_move) = entry
+            if stored_move:
+                tt_move = stored_move
             if stored_depth >= depth:
                 tt_hits_count += 1
+                stored_line = [stored_move] if stored_move else []
                 if stored_bound == EXACT:
                     return (stored_score, stored_line)
                 elif stored_bound == LOWER_BOUND:
@@ -213,80 +409,78 @@ def minimax_alpha_beta(board_obj: CustomBoard, depth: int, alpha: float, beta: f
                 if alpha >= beta:
                     return (stored_score, stored_line)
 
-    moves = board_obj.get_all_legal_moves(board_obj.turn_white)
-    if not moves:
+    # Internal iterative deepening: senza una mossa dalla TT si cerca prima a
+    # profondità ridotta, e la mossa migliore trovata si prova per prima
+    if USE_IID and USE_MOVE_ORDERING and tt_move is None and depth >= IID_MIN_DEPTH:
+        _, iid_line = pvs_search(board_obj, depth - IID_REDUCTION, alpha, beta,
+                                 last_was_capture=last_was_capture,
+                                 ply=ply, prev_move=prev_move)
+        if iid_line:
+            tt_move = iid_line[0]
+
+    # Mosse a stadi (mossa della TT, catture buone, tranquille): la legalità si
+    # verifica solo quando una mossa sta per essere cercata. La variante
+    # dell'iterazione precedente arriva da qui: i suoi nodi sono nella TT
+    if USE_MOVE_ORDERING:
+        moves = board_obj.iter_staged_moves(tt_move,
+                                            quiet_move_key(board_obj, ply, prev_move))
+    else:
+        moves = iter(board_obj.get_all_legal_moves_encoded(board_obj.turn_white))
+    first_move = next(moves, None)
+    if first_move is None:
         # no moves => patta o matto
         if last_was_capture and USE_QUIESCENCE:
-            val_q = quiescence_search(board_obj, alpha, beta, 0)
-            if USE_TRANSPOSITION and pos_hash is not None:
-                TRANSPOSITION_TABLE[pos_hash] = (depth, val_q, EXACT, [])
-            return (val_q, [])
+            val = quiescence_search(board_obj, alpha, beta, 0)
         else:
             val = static_evaluation(board_obj)
-            if USE_TRANSPOSITION and pos_hash is not None:
-                TRANSPOSITION_TABLE[pos_hash] = (depth, val, EXACT, [])
-            return (val, [])
-
-    is_maximizing = board_obj.turn_white
-    best_line = []
-    best_val = -float('inf') if is_maximizing else float('inf')
-
-    # NULL MOVE
-    if USE_NULL_MOVE and depth >= 2 and not board_obj.is_in_check(board_obj.turn_white):
-        def do_null_move(bobj: CustomBoard):
-            bobj.turn_white = not bobj.turn_white
-        def undo_null_move(bobj: CustomBoard):
-            bobj.turn_white = not bobj.turn_white
-
-        do_null_move(board_obj)
+            if not board_obj.turn_white:
+                val = -val
+        if USE_TRANSPOSITION and pos_hash is not None:
+            TRANSPOSITION_TABLE.store(pos_hash, depth, val, EXACT, 0)
+        return (val, [])
+
+    # NULL MOVE (finestra nulla sotto beta: basta sapere se si resta sopra)
+    if (USE_NULL_MOVE and depth >= 2 and beta != float('inf')
+            and not board_obj.is_in_check(board_obj.turn_white)):
+        board_obj.make_null_move()
         null_depth = depth - 1 - NULL_MOVE_REDUCTION
         if null_depth < 0:
             null_depth = 0
-        val_null, _ = minimax_alpha_beta(board_obj, null_depth, alpha, beta,
-                                         last_was_capture=False, pv_move=None)
-        undo_null_move(board_obj)
-
-        if is_maximizing:
-            if val_null >= beta:
-                prunes_count += 1
-                return (beta, [])
-        else:
-            if val_null <= alpha:
-                prunes_count += 1
-                return (alpha, [])
-
-    ordered_moves = order_moves(board_obj, moves, pv_move)
-
-    for mv in ordered_moves:
-        (fr, fc, tr, tc) = mv
-        captured_piece = board_obj.board[tr][tc]
-        move_info = board_obj.make_move_in_place(fr, fc, tr, tc)
-        if not move_info["move_done"]:
+        val_null, _ = pvs_search(board_obj, null_depth, -beta, -beta + PVS_WINDOW,
+                                 last_was_capture=False, ply=ply + 1)
+        board_obj.undo_null_move()
+        if -val_null >= beta:
+            prunes_count += 1
+            return (-val_null, [])
+
+    best_val = -float('inf')
+    best_line = []
+    mv = first_move
+    while mv is not None:
+        to = move_to_sq(mv)
+        captured_piece = board_obj.board[to >> 3][to & 7]
+        move_info = board_obj.make_encoded_move(mv)
+        if not move_info.move_done:
+            mv = next(moves, None)
             continue
 
         new_last_was_capture = (captured_piece != EMPTY and captured_piece not in (WHITE_PAWN, BLACK_PAWN))
 
-        val, sub_line = minimax_alpha_beta(board_obj, depth-1, alpha, beta,
-                                           last_was_capture=new_last_was_capture,
-                                           pv_move=None)
+        val, sub_line = _search_child(board_obj, depth - 1, alpha, beta, not best_line,
+                                      new_last_was_capture, ply + 1, mv)
         board_obj.undo_move_in_place(move_info)
 
-        if is_maximizing:
-            if val > best_val:
-                best_val = val
-                best_line = [mv] + sub_line
-            alpha = max(alpha, best_val)
-            if alpha >= beta:
-                prunes_count += 1
-                break
-        else:
-            if val < best_val:
-                best_val = val
-                best_line = [mv] + sub_line
-            beta = min(beta, best_val)
-            if beta <= alpha:
-                prunes_count += 1
-                break
+        if val > best_val:
+            best_val = val
+            best_line = [mv] + sub_line
+            if val > alpha:
+                alpha = val
+                if alpha >= beta:
+                    prunes_count += 1
+                    if is_quiet_move(mv):
+                        record_quiet_cutoff(board_obj, mv, depth, ply, prev_move)
+                    break
+        mv = next(moves, None)
 
     if USE_TRANSPOSITION and pos_hash is not None:
         if best_val <= alpha_original:
@@ -295,63 +489,80 @@ def minimax_alpha_beta(board_obj: CustomBoard, depth: int, alpha: float, beta: f
             bound_type = LOWER_BOUND
         else:
             bound_type = EXACT
-        TRANSPOSITION_TABLE[pos_hash] = (depth, best_val, bound_type, best_line)
+        TRANSPOSITION_TABLE.store(pos_hash, depth, best_val, bound_type,
+                                  best_line[0] if best_line else 0)
 
     return (best_val, best_line)
 
+def _search_child(board_obj: CustomBoard, depth: int, alpha: float, beta: float, full_window: bool,
+                  last_was_capture: bool, ply: int, prev_move: int):
+    """
+    Cerca la posizione dopo prev_move (già eseguita) e ritorna (punteggio,
+    variante) dal punto di vista di chi ha mosso. Senza full_window si prova
+    prima la finestra nulla sopra alpha, e si ripete con (alpha, beta) solo se
+    la mossa risulta migliore.
+    """
+    if USE_PVS and not full_window and beta - alpha > PVS_WINDOW:
+        val, sub_line = pvs_search(board_obj, depth, -alpha - PVS_WINDOW, -alpha,
+                                   last_was_capture=last_was_capture,
+                                   ply=ply, prev_move=prev_move)
+        val = -val
+        if not (alpha < val < beta):
+            return (val, sub_line)
+    val, sub_line = pvs_search(board_obj, depth, -beta, -alpha,
+                               last_was_capture=last_was_capture,
+                               ply=ply, prev_move=prev_move)
+    return (-val, sub_line)
+
 ###############################################################################
 # FUNZIONI PER DECISIONI
 ###############################################################################
 
 def minimax_decision(board_obj: CustomBoard, depth: int, alpha=-float('inf'), beta=float('inf'), pv_move=None):
-    global expansions_count, prunes_count, tt_hits_count
+    """
+    Ricerca dalla radice: ritorna (punteggio, variante), con il punteggio dal
+    punto di vista del colore di turno.
+    """
+    global prunes_count
 
-    moves = board_obj.get_all_legal_moves(board_obj.turn_white)
+    moves = board_obj.get_all_legal_moves_encoded(board_obj.turn_white, ROOT_MOVES_BUFFER)
     if not moves:
         return (None, [])
 
-    is_maximizing = board_obj.turn_white
-    best_val = -float('inf') if is_maximizing else float('inf')
+    best_val = -float('inf')
     best_line = []
 
     ordered_moves = order_moves(board_obj, moves, pv_move)
 
     for mv in ordered_moves:
-        (fr, fc, tr, tc) = mv
-        captured_piece = board_obj.board[tr][tc]
-        move_info = board_obj.make_move_in_place(fr, fc, tr, tc)
-        if not move_info["move_done"]:
+        to = move_to_sq(mv)
+        captured_piece = board_obj.board[to >> 3][to & 7]
+        move_info = board_obj.make_encoded_move(mv)
+        if not move_info.move_done:
             continue
 
         new_last_was_capture = (captured_piece != EMPTY and captured_piece not in (WHITE_PAWN, BLACK_PAWN))
 
-        val, sub_line = minimax_alpha_beta(board_obj, depth-1, alpha, beta,
-                                           last_was_capture=new_last_was_capture,
-                                           pv_move=None)
+        val, sub_line = _search_child(board_obj, depth - 1, alpha, beta, not best_line,
+                                      new_last_was_capture, 1, mv)
         board_obj.undo_move_in_place(move_info)
 
-        if is_maximizing:
-            if val > best_val:
-                best_val = val
-                best_line = [mv] + sub_line
-            alpha = max(alpha, best_val)
-            if alpha >= beta:
-                prunes_count += 1
-                break
-        else:
-            if val < best_val:
-                best_val = val
-                best_line = [mv] + sub_line
-            beta = min(beta, best_val)
-            if beta <= alpha:
-                prunes_count += 1
-                break
+        if val > best_val:
+            best_val = val
+            best_line = [mv] + sub_line
+            if val > alpha:
+                alpha = val
+                if alpha >= beta:
+                    prunes_count += 1
+                    break
 
     return (best_val, best_line)
 
 def iterative_deepening_decision(board_obj: CustomBoard, max_depth=4, max_time=6):
     global expansions_count, prunes_count, aspiration_fails_count, tt_hits_count
     reset_debug_counters()
+    TRANSPOSITION_TABLE.new_search()
+    age_move_heuristics()
 
     best_move = None
     best_line = []
@@ -384,8 +595,8 @@ def iterative_deepening_decision(board_obj: CustomBoard, max_depth=4, max_time=6
 
         if DEBUG_MODE:
             from chessapp import convert_move_to_algebraic_detailed
-            if best_move:
-                human_move = convert_move_to_algebraic_detailed(best_move, board_obj)
+            if best_move is not None:
+                human_move = convert_move_to_algebraic_detailed(decode_move(best_move), board_obj)
             else:
                 human_move = "None"
             print(f"[DEBUG] ID Depth {d}: best move = {human_move}, val = {val}, time={iteration_time:.3f}s")
@@ -395,4 +606,7 @@ def iterative_deepening_decision(board_obj: CustomBoard, max_depth=4, max_time=6
         if total_elapsed > max_time:
             break
 
-    return best_move
+    # ChessApp lavora con le tuple (fr, fc, tr, tc)
+    if best_move is None:
+        return None
+    return decode_move(best_move)
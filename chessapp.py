@@ -11,6 +11,7 @@ except AttributeError:
     LANCZOS_FILTER = Image.LANCZOS
 
 from customboard import CustomBoard
+from customboard.position_file import parse_position_lines
 
 from evaluation import (
     compute_material_display,
@@ -19,6 +20,7 @@ from evaluation import (
 from ai_engine import (
     iterative_deepening_decision,
     evaluation_breakdown,
+    clear_move_heuristics,
     TRANSPOSITION_TABLE
 )
 from piece_movement.piece_movement_common import (
@@ -203,6 +205,7 @@ class ChessApp:
 
     def setup_new_game(self):
         TRANSPOSITION_TABLE.clear()
+        clear_move_heuristics()
 
         faction_bianchi = ask_option_dialog(
             self.root,
@@ -593,117 +596,16 @@ class ChessApp:
         try:
             with open(filename,"r") as f:
                 lines = [line.rstrip("\n") for line in f]
-            if len(lines)<8:
-                messagebox.showerror("Error","File non valido o troppo corto.")
+            try:
+                new_board = parse_position_lines(lines)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
                 return
-            from customboard import CustomBoard
-            new_board = CustomBoard()
             random.seed(time.time())
             new_board.game_noise_seed = random.randint(0,1000000)
             print("Partita caricata, nuovo seed =", new_board.game_noise_seed)
-            new_board.move_history.clear()
-
-            for r in range(8):
-                row_line = lines[r].strip()
-                piece_names = row_line.split(",")
-                if len(piece_names)!=8:
-                    messagebox.showerror("Error", f"Riga {r+1} non valida (8 pezzi).")
-                    return
-                for c in range(8):
-                    new_board.board[r][c] = int(piece_names[c])
-
-            idx = 8
-            if idx>=len(lines) or not lines[idx].startswith("GAME_OVER:"):
-                messagebox.showerror("Error","Formato file non corretto (GAME_OVER).")
-                return
-            idx+=1
-            val_go = lines[idx].strip() if idx<len(lines) else ""
-            new_board.game_over = (val_go=="True")
-            idx+=1
-
-            if idx>=len(lines) or not lines[idx].startswith("WINNER:"):
-                messagebox.showerror("Error","Formato file non corretto (WINNER).")
-                return
-            winner_val = lines[idx].split(":",1)[1].strip()
-            if winner_val=="None":
-                new_board.winner = None
-            else:
-                new_board.winner = winner_val
-            idx+=1
-
-            if idx>=len(lines) or not lines[idx].startswith("Turn:"):
-                messagebox.showerror("Error","Formato file non corretto (Turn).")
-                return
-            turn_str = lines[idx].split(":",1)[1].strip()
-            new_board.turn_white = (turn_str=="W")
-            idx+=1
-
-            def parse_bool(line_str, prefix):
-                if not line_str.startswith(prefix):
-                    messagebox.showerror("Error", f"Formato file non corretto ({prefix}).")
-                    return None
-                val = line_str.split(":",1)[1].strip()
-                return (val=="True")
-
-            if idx<len(lines):
-                wkm = parse_bool(lines[idx], "WHITE_KING_MOVED")
-                if wkm is None: return
-                new_board.white_king_moved = wkm
-                idx+=1
-
-            if idx<len(lines):
-                wlrm = parse_bool(lines[idx], "WHITE_LEFT_ROOK_MOVED")
-                if wlrm is None: return
-                new_board.white_left_rook_moved = wlrm
-                idx+=1
-
-            if idx<len(lines):
-                wrrm = parse_bool(lines[idx], "WHITE_RIGHT_ROOK_MOVED")
-                if wrrm is None: return
-                new_board.white_right_rook_moved = wrrm
-                idx+=1
-
-            if idx<len(lines):
-                bkm = parse_bool(lines[idx], "BLACK_KING_MOVED")
-                if bkm is None: return
-                new_board.black_king_moved = bkm
-                idx+=1
-
-            if idx<len(lines):
-                blrm = parse_bool(lines[idx], "BLACK_LEFT_ROOK_MOVED")
-                if blrm is None: return
-                new_board.black_left_rook_moved = blrm
-                idx+=1
-
-            if idx<len(lines):
-                brrm = parse_bool(lines[idx], "BLACK_RIGHT_ROOK_MOVED")
-                if brrm is None: return
-                new_board.black_right_rook_moved = brrm
-                idx+=1
-
-            if idx<len(lines) and lines[idx].startswith("WHITE_TOTEM_INHERITED:"):
-                wti_str = lines[idx].split(":",1)[1].strip()
-                if wti_str == "NONE":
-                    new_board.white_totem_inherited = None
-                else:
-                    new_board.white_totem_inherited = wti_str
-                idx+=1
-
-            if idx<len(lines) and lines[idx].startswith("BLACK_TOTEM_INHERITED:"):
-                bti_str = lines[idx].split(":",1)[1].strip()
-                if bti_str == "NONE":
-                    new_board.black_totem_inherited = None
-                else:
-                    new_board.black_totem_inherited = bti_str
-                idx+=1
-
-            if idx<len(lines) and lines[idx].strip()=="MOVE_HISTORY:":
-                idx+=1
-                while idx<len(lines):
-                    mh_line = lines[idx].strip()
-                    if mh_line:
-                        new_board.move_history.append(mh_line)
-                    idx+=1
+            # Nuovo seed di rumore: le valutazioni memorizzate non valgono più
+            TRANSPOSITION_TABLE.clear()
 
             self.game_board = new_board
             self.selected_square = None
@@ -12,7 +12,12 @@ from piece_movement.piece_movement_common import (
     WHITE_BISHOP, BLACK_BISHOP,
     WHITE_QUEEN, BLACK_QUEEN,
     WHITE_KING, BLACK_KING,
-    is_white_piece, is_black_piece
+    is_white_piece
+)
+from .zobrist import (
+    compute_zobrist,
+    WHITE_CASTLE_SHORT, WHITE_CASTLE_LONG, BLACK_CASTLE_SHORT, BLACK_CASTLE_LONG,
+    WHITE_CASTLING, BLACK_CASTLING, ALL_CASTLING
 )
 
 def _setup_initial_board(board_obj):
@@ -61,32 +66,116 @@ class CustomBoard:
     di board_setup.py e board_state.py. La logica delle mosse (board_moves e board_castling)
     è spostata su moves.py.
     """
-    def __init__(self, parent=None, white_faction="nativi", black_faction="classici"):
+    def __init__(self, parent=None, white_faction="nativi", black_faction="classici",
+                 use_bitboards=True):
         self.parent = parent
         self.white_faction = white_faction
         self.black_faction = black_faction
 
+        # Se True, generazione mosse, attacchi e valutazione usano i bitboard;
+        # altrimenti si usa la scansione classica della matrice 8x8.
+        self.use_bitboards = use_bitboards
+
         self.board = [[EMPTY for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         self.turn_white = True
         self.move_history = []
         self.game_over = False
         self.winner = None
 
-        self.white_king_moved = False
-        self.white_left_rook_moved = False
-        self.white_right_rook_moved = False
-
-        self.black_king_moved = False
-        self.black_left_rook_moved = False
-        self.black_right_rook_moved = False
+        # Diritti di arrocco (maschera a 4 bit, vedi zobrist.py): un diritto si
+        # perde quando si muove il Re o la Torre/Totem del lato corrispondente
+        self.castling_rights = ALL_CASTLING
 
         # Nuovi campi per gestire l'eredità dei Totem
         self.white_totem_inherited = None
         self.black_totem_inherited = None
 
+        # Mosse legali per chiave Zobrist, per GUI, make_move e fine partita
+        # (limitata a LEGAL_MOVE_CACHE_SIZE posizioni, vedi moves.py)
+        self.legal_move_cache = {}
+
         # Inizializza la scacchiera
         _setup_initial_board(self)
 
+        # Chiave Zobrist a 64 bit, bitboard (una maschera per codice pezzo
+        # più l'occupazione per colore), insiemi delle caselle occupate per
+        # colore, caselle dei due Re e flag di scacco, aggiornati in modo
+        # incrementale da make_move_in_place / undo_move_in_place
+        self.refresh_state()
+
+    def refresh_state(self):
+        """
+        Ricalcola lo stato derivato (chiave Zobrist, bitboard, liste dei pezzi,
+        caselle dei Re, pezzi congelati, scacco al colore di turno) dopo
+        modifiche dirette a board, turno o diritti di arrocco, ad esempio
+        quando si carica una posizione da file.
+        """
+        self.zobrist_key = compute_zobrist(self)
+
+        self.piece_bb = [0] * 19
+        self.white_bb = 0
+        self.black_bb = 0
+        # Caselle (sq = r * 8 + c) occupate da ciascun colore
+        self.white_squares = set()
+        self.black_squares = set()
+        # Casella del Re di ciascun colore, None se assente
+        self.white_king_sq = None
+        self.black_king_sq = None
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                p = self.board[r][c]
+                if p == EMPTY:
+                    continue
+                sq = r * BOARD_SIZE + c
+                bit = 1 << sq
+                self.piece_bb[p] |= bit
+                if is_white_piece(p):
+                    self.white_bb |= bit
+                    self.white_squares.add(sq)
+                else:
+                    self.black_bb |= bit
+                    self.black_squares.add(sq)
+                if p == WHITE_KING:
+                    self.white_king_sq = sq
+                elif p == BLACK_KING:
+                    self.black_king_sq = sq
+
+        # Animali congelati da uno Sciamano avversario, per colore
+        # (white_frozen_bb / black_frozen_bb, aggiornati da _set_square)
+        from .moves import refresh_frozen_bb, _is_king_attacked
+        refresh_frozen_bb(self)
+
+        # True se il colore di turno è sotto scacco (poi aggiornato da make/unmake)
+        self.in_check = _is_king_attacked(self, self.turn_white)
+
+    # ---------------------------
+    # Vecchi flag di arrocco (sola lettura, ricavati da castling_rights):
+    # restano per il formato dei file salvati
+    # ---------------------------
+    @property
+    def white_king_moved(self):
+        return not (self.castling_rights & WHITE_CASTLING)
+
+    @property
+    def white_left_rook_moved(self):
+        return not (self.castling_rights & WHITE_CASTLE_LONG)
+
+    @property
+    def white_right_rook_moved(self):
+        return not (self.castling_rights & WHITE_CASTLE_SHORT)
+
+    @property
+    def black_king_moved(self):
+        return not (self.castling_rights & BLACK_CASTLING)
+
+    @property
+    def black_left_rook_moved(self):
+        return not (self.castling_rights & BLACK_CASTLE_LONG)
+
+    @property
+    def black_right_rook_moved(self):
+        return not (self.castling_rights & BLACK_CASTLE_SHORT)
+
     # ---------------------------
     # Metodi "stato di gioco"
     # ---------------------------
@@ -128,12 +217,68 @@ class CustomBoard:
         from .moves import get_all_legal_moves
         return get_all_legal_moves(self, white)
 
+    def get_all_legal_moves_encoded(self, white=True, buf=None):
+        """
+        Come get_all_legal_moves, con le mosse codificate come interi in un
+        array('H') (riutilizza buf se dato).
+        """
+        from .moves import get_all_legal_moves_encoded
+        return get_all_legal_moves_encoded(self, white, buf)
+
+    def count_legal_moves(self, white=True):
+        """
+        Numero di mosse legali per il colore specificato, senza costruire la lista.
+        """
+        from .moves import count_legal_moves
+        return count_legal_moves(self, white)
+
+    def has_any_legal_move(self, white=True):
+        """
+        True se il colore specificato ha almeno una mossa legale (si ferma alla prima).
+        """
+        from .moves import has_any_legal_move
+        return has_any_legal_move(self, white)
+
+    def get_evasions(self, white=True, buf=None):
+        """
+        Mosse legali (codificate) del colore specificato quando è sotto scacco:
+        mosse del Re, catture del pezzo che dà scacco e interposizioni.
+        """
+        from .moves import get_evasions
+        return get_evasions(self, white, buf)
+
+    def count_evasions(self, white=True):
+        """
+        Numero di evasioni dallo scacco, come coppia (mosse del Re, altre mosse),
+        senza costruire la lista.
+        """
+        from .moves import get_evasions
+        return get_evasions(self, white, count_only=True)
+
+    def get_legal_captures(self, white=True, buf=None):
+        """
+        Ritorna le sole catture legali (codificate) per il colore specificato,
+        in ordine MVV-LVA.
+        """
+        from .moves import get_legal_captures
+        return get_legal_captures(self, white, buf)
+
+    def iter_staged_moves(self, first_move=None, quiet_key=None):
+        """
+        Generatore delle mosse legali (codificate) del colore di turno a stadi
+        (first_move, catture buone, mosse tranquille ordinate con quiet_key,
+        altre catture).
+        """
+        from .moves import iter_staged_moves
+        return iter_staged_moves(self, first_move, quiet_key)
+
     def get_legal_moves_for_square(self, r, c):
         """
-        Ritorna tutte le mosse legali di un pezzo in (r, c).
+        Ritorna tutte le mosse legali di un pezzo in (r, c), lette dalla cache
+        delle mosse legali della posizione (vedi legal_move_cache).
         """
-        from .moves import get_legal_moves_for_square
-        return get_legal_moves_for_square(self, r, c)
+        from .moves import get_cached_legal_moves_for_square
+        return get_cached_legal_moves_for_square(self, r, c)
 
     def make_move(self, fr, fc, tr, tc, promotion_piece=None):
         """
@@ -149,9 +294,30 @@ class CustomBoard:
         from .moves import make_move_in_place
         return make_move_in_place(self, fr, fc, tr, tc, promotion_piece)
 
+    def make_encoded_move(self, move):
+        """
+        make_move_in_place per una mossa codificata come intero.
+        """
+        from .moves import make_encoded_move
+        return make_encoded_move(self, move)
+
     def undo_move_in_place(self, move_info):
         """
         Annulla l'ultima mossa, usando i dati salvati in move_info.
         """
         from .moves import undo_move_in_place
         return undo_move_in_place(self, move_info)
+
+    def make_null_move(self):
+        """
+        Passa il turno senza muovere (null move della ricerca), aggiornando la chiave.
+        """
+        from .moves import make_null_move
+        return make_null_move(self)
+
+    def undo_null_move(self):
+        """
+        Annulla una null move.
+        """
+        from .moves import undo_null_move
+        return undo_null_move(self)
@@ -0,0 +1,82 @@
+# move_encoding.py
+
+from piece_movement.piece_movement_common import (
+    BOARD_SIZE, EMPTY,
+    WHITE_PAWN, BLACK_PAWN,
+    WHITE_BISON, BLACK_BISON,
+    WHITE_KING, BLACK_KING,
+    is_white_piece
+)
+
+# --------------------------------------------------------------------------
+# Mossa codificata in un intero a 16 bit (entra in un array('H')):
+#   bit  0-5   casella di partenza  (sq = r * 8 + c)
+#   bit  6-11  casella d'arrivo
+#   bit 12     cattura
+#   bit 13     spinta del Bisonte (cattura di un pedone)
+#   bit 14     arrocco
+#   bit 15     promozione (sempre a Regina)
+# La forma a tupla (fr, fc, tr, tc) resta quella usata da ChessApp e da
+# make_move / make_move_in_place.
+# --------------------------------------------------------------------------
+
+MOVE_SQUARE_MASK = 0x3F
+MOVE_SQUARES_MASK = 0xFFF
+MOVE_TO_SHIFT = 6
+
+MOVE_FLAG_CAPTURE = 1 << 12
+MOVE_FLAG_BISON_PUSH = 1 << 13
+MOVE_FLAG_CASTLING = 1 << 14
+MOVE_FLAG_PROMOTION = 1 << 15
+
+# Tupla (fr, fc, tr, tc) per ogni coppia di caselle: la decodifica è un
+# accesso a tabella e non crea nuove tuple
+_DECODE_TABLE = tuple(
+    (frm // BOARD_SIZE, frm % BOARD_SIZE, to // BOARD_SIZE, to % BOARD_SIZE)
+    for to in range(BOARD_SIZE * BOARD_SIZE)
+    for frm in range(BOARD_SIZE * BOARD_SIZE)
+)
+
+def move_from_sq(move):
+    return move & MOVE_SQUARE_MASK
+
+def move_to_sq(move):
+    return (move >> MOVE_TO_SHIFT) & MOVE_SQUARE_MASK
+
+def decode_move(move):
+    """
+    Ritorna la tupla (fr, fc, tr, tc) della mossa codificata.
+    """
+    return _DECODE_TABLE[move & MOVE_SQUARES_MASK]
+
+def move_flags(board_obj, fr, fc, tr, tc):
+    """
+    Flag della mossa (fr, fc) -> (tr, tc) nella posizione corrente, prima di eseguirla.
+    """
+    mover = board_obj.board[fr][fc]
+    occupant = board_obj.board[tr][tc]
+    flags = 0
+    if occupant != EMPTY and is_white_piece(occupant) != is_white_piece(mover):
+        flags |= MOVE_FLAG_CAPTURE
+        if mover in (WHITE_BISON, BLACK_BISON) and occupant in (WHITE_PAWN, BLACK_PAWN):
+            flags |= MOVE_FLAG_BISON_PUSH
+    if mover in (WHITE_KING, BLACK_KING) and abs(tc - fc) == 2:
+        flags |= MOVE_FLAG_CASTLING
+    if (mover == WHITE_PAWN and tr == 0) or (mover == BLACK_PAWN and tr == BOARD_SIZE - 1):
+        flags |= MOVE_FLAG_PROMOTION
+    return flags
+
+def encode_move(board_obj, fr, fc, tr, tc):
+    """
+    Codifica la mossa (fr, fc, tr, tc), flag compresi, nella posizione corrente.
+    """
+    return ((fr * BOARD_SIZE + fc)
+            | ((tr * BOARD_SIZE + tc) << MOVE_TO_SHIFT)
+            | move_flags(board_obj, fr, fc, tr, tc))
+
+def decode_moves(moves):
+    """
+    Lista di tuple (fr, fc, tr, tc) per una sequenza di mosse codificate
+    (ad esempio una variante principale da mostrare nella GUI).
+    """
+    return [_DECODE_TABLE[m & MOVE_SQUARES_MASK] for m in moves]
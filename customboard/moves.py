@@ -1,5 +1,7 @@
 # moves.py
 
+from array import array
+
 from piece_movement.piece_movement_common import (
     BOARD_SIZE, EMPTY,
     WHITE_PAWN, BLACK_PAWN,
@@ -11,235 +13,175 @@ from piece_movement.piece_movement_common import (
     WHITE_ROOK, BLACK_ROOK,
     WHITE_KING, BLACK_KING,
     WHITE_QUEEN, BLACK_QUEEN,
+    PIECE_VALUE,
     is_white_piece, is_black_piece,
     in_bounds, get_all_pseudo_moves_for_square
 )
 
-from piece_movement.piece_attacks import is_square_attacked  # usa la versione aggiornata
+from piece_movement.piece_attacks import (  # usa la versione aggiornata
+    is_square_attacked, attackers_to_bb, slider_attackers_bb
+)
+from piece_movement.bitboards import (
+    FULL_BB, RANK_BB, popcount, piece_targets_bb, piece_attacks_bb, rook_attacks_bb, bishop_attacks_bb
+)
+from piece_movement.attack_tables import (
+    ORTHOGONAL_NEIGHBORS_BB, KING_ATTACKS_BB, BETWEEN_BB
+)
+from .move_encoding import (
+    MOVE_SQUARE_MASK, MOVE_TO_SHIFT,
+    MOVE_FLAG_CAPTURE, MOVE_FLAG_BISON_PUSH, MOVE_FLAG_CASTLING, MOVE_FLAG_PROMOTION,
+    encode_move, decode_move, decode_moves
+)
+from .zobrist import (
+    ZOBRIST_PIECE, ZOBRIST_SIDE, ZOBRIST_CASTLING,
+    ZOBRIST_WHITE_INHERITED, ZOBRIST_BLACK_INHERITED,
+    WHITE_CASTLE_SHORT, WHITE_CASTLE_LONG, BLACK_CASTLE_SHORT, BLACK_CASTLE_LONG,
+    WHITE_CASTLING, BLACK_CASTLING
+)
+
+# Pezzi che possono congelare o essere congelati
+_FREEZE_PIECES = frozenset((
+    WHITE_SHAMAN, BLACK_SHAMAN,
+    WHITE_KNIGHT, BLACK_KNIGHT,
+    WHITE_BISON, BLACK_BISON,
+))
 
 # -------------------------------------------------------
-# Sezione "Arrocco" (ex board_castling.py)
+# Scrittura caselle (mantiene aggiornati chiave Zobrist,
+# bitboard, liste dei pezzi e caselle dei Re)
 # -------------------------------------------------------
-def white_castle_short_inplace_classical(board_obj):
-    if board_obj.white_king_moved or board_obj.white_right_rook_moved:
-        return False
-    if is_in_check(board_obj, True):
-        return False
-    if (board_obj.board[7][5] != EMPTY or board_obj.board[7][6] != EMPTY):
-        return False
-    if board_obj.board[7][7] != WHITE_ROOK:
-        return False
-    old_king = board_obj.board[7][4]
-    old_rook = board_obj.board[7][7]
-    board_obj.board[7][4] = EMPTY
-    board_obj.board[7][7] = EMPTY
-    board_obj.board[7][6] = old_king
-    board_obj.board[7][5] = old_rook
-    if is_in_check(board_obj, True):
-        board_obj.board[7][4] = old_king
-        board_obj.board[7][7] = old_rook
-        board_obj.board[7][6] = EMPTY
-        board_obj.board[7][5] = EMPTY
-        return False
-    board_obj.white_king_moved = True
-    board_obj.white_right_rook_moved = True
-    return True
+def _set_square(board_obj, r, c, piece):
+    sq = r * BOARD_SIZE + c
+    old = board_obj.board[r][c]
+    board_obj.zobrist_key ^= ZOBRIST_PIECE[old][sq] ^ ZOBRIST_PIECE[piece][sq]
+    board_obj.board[r][c] = piece
+
+    # Bitboard: togli il vecchio pezzo, aggiungi il nuovo
+    bit = 1 << sq
+    if old != EMPTY:
+        board_obj.piece_bb[old] ^= bit
+        if old & 1:
+            board_obj.white_bb ^= bit
+            board_obj.white_squares.discard(sq)
+            if old == WHITE_KING and board_obj.white_king_sq == sq:
+                board_obj.white_king_sq = None
+        else:
+            board_obj.black_bb ^= bit
+            board_obj.black_squares.discard(sq)
+            if old == BLACK_KING and board_obj.black_king_sq == sq:
+                board_obj.black_king_sq = None
+    if piece != EMPTY:
+        board_obj.piece_bb[piece] |= bit
+        if piece & 1:
+            board_obj.white_bb |= bit
+            board_obj.white_squares.add(sq)
+            if piece == WHITE_KING:
+                board_obj.white_king_sq = sq
+        else:
+            board_obj.black_bb |= bit
+            board_obj.black_squares.add(sq)
+            if piece == BLACK_KING:
+                board_obj.black_king_sq = sq
 
-def white_castle_long_inplace_classical(board_obj):
-    if board_obj.white_king_moved or board_obj.white_left_rook_moved:
-        return False
-    if is_in_check(board_obj, True):
-        return False
-    if (board_obj.board[7][1] != EMPTY or
-        board_obj.board[7][2] != EMPTY or
-        board_obj.board[7][3] != EMPTY):
-        return False
-    if board_obj.board[7][0] != WHITE_ROOK:
-        return False
-    old_king = board_obj.board[7][4]
-    old_rook = board_obj.board[7][0]
-    board_obj.board[7][4] = EMPTY
-    board_obj.board[7][0] = EMPTY
-    board_obj.board[7][2] = old_king
-    board_obj.board[7][3] = old_rook
-    if is_in_check(board_obj, True):
-        board_obj.board[7][4] = old_king
-        board_obj.board[7][0] = old_rook
-        board_obj.board[7][2] = EMPTY
-        board_obj.board[7][3] = EMPTY
-        return False
-    board_obj.white_king_moved = True
-    board_obj.white_left_rook_moved = True
-    return True
+    # Maschere di congelamento: cambiano solo con Sciamani e animali
+    if old in _FREEZE_PIECES:
+        _update_frozen_bb(board_obj, old)
+    if piece in _FREEZE_PIECES:
+        _update_frozen_bb(board_obj, piece)
 
-def black_castle_short_inplace_classical(board_obj):
-    if board_obj.black_king_moved or board_obj.black_right_rook_moved:
-        return False
-    if is_in_check(board_obj, False):
-        return False
-    if (board_obj.board[0][5] != EMPTY or board_obj.board[0][6] != EMPTY):
-        return False
-    if board_obj.board[0][7] != BLACK_ROOK:
-        return False
-    old_king = board_obj.board[0][4]
-    old_rook = board_obj.board[0][7]
-    board_obj.board[0][4] = EMPTY
-    board_obj.board[0][7] = EMPTY
-    board_obj.board[0][6] = old_king
-    board_obj.board[0][5] = old_rook
-    if is_in_check(board_obj, False):
-        board_obj.board[0][4] = old_king
-        board_obj.board[0][7] = old_rook
-        board_obj.board[0][6] = EMPTY
-        board_obj.board[0][5] = EMPTY
-        return False
-    board_obj.black_king_moved = True
-    board_obj.black_right_rook_moved = True
-    return True
-
-def black_castle_long_inplace_classical(board_obj):
-    if board_obj.black_king_moved or board_obj.black_left_rook_moved:
-        return False
-    if is_in_check(board_obj, False):
-        return False
-    if (board_obj.board[0][1] != EMPTY or
-        board_obj.board[0][2] != EMPTY or
-        board_obj.board[0][3] != EMPTY):
-        return False
-    if board_obj.board[0][0] != BLACK_ROOK:
-        return False
-    old_king = board_obj.board[0][4]
-    old_rook = board_obj.board[0][0]
-    board_obj.board[0][4] = EMPTY
-    board_obj.board[0][0] = EMPTY
-    board_obj.board[0][2] = old_king
-    board_obj.board[0][3] = old_rook
-    if is_in_check(board_obj, False):
-        board_obj.board[0][4] = old_king
-        board_obj.board[0][0] = old_rook
-        board_obj.board[0][2] = EMPTY
-        board_obj.board[0][3] = EMPTY
-        return False
-    board_obj.black_king_moved = True
-    board_obj.black_left_rook_moved = True
-    return True
+# -------------------------------------------------------
+# Maschere dei pezzi congelati dagli Sciamani
+# -------------------------------------------------------
+def _frozen_pieces_bb(board_obj, white):
+    """
+    Animali (Cavalli e Bisonti) del colore 'white' ortogonalmente adiacenti
+    a uno Sciamano avversario.
+    """
+    bb = board_obj.piece_bb
+    if white:
+        shamans = bb[BLACK_SHAMAN]
+        animals = bb[WHITE_KNIGHT] | bb[WHITE_BISON]
+    else:
+        shamans = bb[WHITE_SHAMAN]
+        animals = bb[BLACK_KNIGHT] | bb[BLACK_BISON]
+    zone = 0
+    while shamans:
+        low = shamans & -shamans
+        shamans ^= low
+        zone |= ORTHOGONAL_NEIGHBORS_BB[low.bit_length() - 1]
+    return zone & animals
+
+def refresh_frozen_bb(board_obj):
+    board_obj.white_frozen_bb = _frozen_pieces_bb(board_obj, True)
+    board_obj.black_frozen_bb = _frozen_pieces_bb(board_obj, False)
+
+def _update_frozen_bb(board_obj, changed):
+    """
+    Aggiorna la maschera toccata dal pezzo 'changed' appena messo o tolto:
+    uno Sciamano cambia quella avversaria, un animale quella del suo colore.
+    """
+    if changed == BLACK_SHAMAN or changed == WHITE_KNIGHT or changed == WHITE_BISON:
+        board_obj.white_frozen_bb = _frozen_pieces_bb(board_obj, True)
+    else:
+        board_obj.black_frozen_bb = _frozen_pieces_bb(board_obj, False)
 
-def white_castle_short_inplace_nativi(board_obj):
-    if board_obj.white_king_moved or board_obj.white_right_rook_moved:
-        return False
-    if is_in_check(board_obj, True):
-        return False
-    if (board_obj.board[7][5] != EMPTY or board_obj.board[7][6] != EMPTY):
-        return False
-    if board_obj.board[7][7] != WHITE_TOTEM:
-        return False
-    old_king = board_obj.board[7][4]
-    old_totem = board_obj.board[7][7]
-    board_obj.board[7][4] = EMPTY
-    board_obj.board[7][7] = EMPTY
-    board_obj.board[7][6] = old_king
-    board_obj.board[7][5] = old_totem
-    if is_in_check(board_obj, True):
-        board_obj.board[7][4] = old_king
-        board_obj.board[7][7] = old_totem
-        board_obj.board[7][6] = EMPTY
-        board_obj.board[7][5] = EMPTY
-        return False
-    board_obj.white_king_moved = True
-    board_obj.white_right_rook_moved = True
-    return True
+# -------------------------------------------------------
+# Sezione "Arrocco" (ex board_castling.py)
+# -------------------------------------------------------
+def _squares_bb(*squares):
+    bb = 0
+    for sq in squares:
+        bb |= 1 << sq
+    return bb
+
+# Una riga per arrocco, valida per entrambe le fazioni (il partner è la Torre
+# per i classici, il Totem per i nativi):
+# (diritto, bianco?, Re da, Re a, partner da, partner a,
+#  caselle che devono essere vuote, caselle che non devono essere attaccate)
+CASTLING_TABLE = (
+    (WHITE_CASTLE_SHORT, True, 60, 62, 63, 61, _squares_bb(61, 62), (61, 62)),
+    (WHITE_CASTLE_LONG, True, 60, 58, 56, 59, _squares_bb(57, 58, 59), (59, 58)),
+    (BLACK_CASTLE_SHORT, False, 4, 6, 7, 5, _squares_bb(5, 6), (5, 6)),
+    (BLACK_CASTLE_LONG, False, 4, 2, 0, 3, _squares_bb(1, 2, 3), (3, 2)),
+)
 
-def white_castle_long_inplace_nativi(board_obj):
-    if board_obj.white_king_moved or board_obj.white_left_rook_moved:
-        return False
-    if is_in_check(board_obj, True):
-        return False
-    if (board_obj.board[7][1] != EMPTY or
-        board_obj.board[7][2] != EMPTY or
-        board_obj.board[7][3] != EMPTY):
-        return False
-    if board_obj.board[7][0] != WHITE_TOTEM:
-        return False
-    old_king = board_obj.board[7][4]
-    old_totem = board_obj.board[7][0]
-    board_obj.board[7][4] = EMPTY
-    board_obj.board[7][0] = EMPTY
-    board_obj.board[7][2] = old_king
-    board_obj.board[7][3] = old_totem
-    if is_in_check(board_obj, True):
-        board_obj.board[7][4] = old_king
-        board_obj.board[7][0] = old_totem
-        board_obj.board[7][2] = EMPTY
-        board_obj.board[7][3] = EMPTY
-        return False
-    board_obj.white_king_moved = True
-    board_obj.white_left_rook_moved = True
-    return True
+# Pezzo che arrocca con il Re, per (colore bianco?, fazione)
+CASTLING_PARTNER = {
+    (True, "classici"): WHITE_ROOK,
+    (True, "nativi"): WHITE_TOTEM,
+    (False, "classici"): BLACK_ROOK,
+    (False, "nativi"): BLACK_TOTEM,
+}
 
-def black_castle_short_inplace_nativi(board_obj):
-    if board_obj.black_king_moved or board_obj.black_right_rook_moved:
-        return False
-    if is_in_check(board_obj, False):
-        return False
-    if (board_obj.board[0][5] != EMPTY or board_obj.board[0][6] != EMPTY):
-        return False
-    if board_obj.board[0][7] != BLACK_TOTEM:
-        return False
-    old_king = board_obj.board[0][4]
-    old_totem = board_obj.board[0][7]
-    board_obj.board[0][4] = EMPTY
-    board_obj.board[0][7] = EMPTY
-    board_obj.board[0][6] = old_king
-    board_obj.board[0][5] = old_totem
-    if is_in_check(board_obj, False):
-        board_obj.board[0][4] = old_king
-        board_obj.board[0][7] = old_totem
-        board_obj.board[0][6] = EMPTY
-        board_obj.board[0][5] = EMPTY
-        return False
-    board_obj.black_king_moved = True
-    board_obj.black_right_rook_moved = True
-    return True
+# Righe di CASTLING_TABLE per (Re, casella d'arrivo del Re)
+_CASTLE_BY_KING_MOVE = {
+    (WHITE_KING if entry[1] else BLACK_KING, entry[3]): entry
+    for entry in CASTLING_TABLE
+}
 
-def black_castle_long_inplace_nativi(board_obj):
-    if board_obj.black_king_moved or board_obj.black_left_rook_moved:
-        return False
-    if is_in_check(board_obj, False):
-        return False
-    if (board_obj.board[0][1] != EMPTY or
-        board_obj.board[0][2] != EMPTY or
-        board_obj.board[0][3] != EMPTY):
-        return False
-    if board_obj.board[0][0] != BLACK_TOTEM:
-        return False
-    old_king = board_obj.board[0][4]
-    old_totem = board_obj.board[0][0]
-    board_obj.board[0][4] = EMPTY
-    board_obj.board[0][0] = EMPTY
-    board_obj.board[0][2] = old_king
-    board_obj.board[0][3] = old_totem
-    if is_in_check(board_obj, False):
-        board_obj.board[0][4] = old_king
-        board_obj.board[0][0] = old_totem
-        board_obj.board[0][2] = EMPTY
-        board_obj.board[0][3] = EMPTY
-        return False
-    board_obj.black_king_moved = True
-    board_obj.black_left_rook_moved = True
-    return True
+# Diritti persi quando una Torre o un Totem lascia la propria casella d'angolo
+_CASTLING_RIGHTS_LOST = {}
+for _entry in CASTLING_TABLE:
+    for _partner in ((WHITE_ROOK, WHITE_TOTEM) if _entry[1] else (BLACK_ROOK, BLACK_TOTEM)):
+        _CASTLING_RIGHTS_LOST[(_partner, _entry[4])] = _entry[0]
 
 # -------------------------------------------------------
 # Sezione "board_state.py" (scacco, patta, vincitore)
 # -------------------------------------------------------
 def find_king_position(board_obj, white):
-    king = WHITE_KING if white else BLACK_KING
-    for rr in range(BOARD_SIZE):
-        for cc in range(BOARD_SIZE):
-            if board_obj.board[rr][cc] == king:
-                return (rr, cc)
-    return (None, None)
+    # Casella del Re mantenuta da _set_square: nessuna scansione
+    sq = board_obj.white_king_sq if white else board_obj.black_king_sq
+    if sq is None:
+        return (None, None)
+    return divmod(sq, BOARD_SIZE)
 
 def is_in_check(board_obj, white=True):
+    if white == board_obj.turn_white:
+        # Flag mantenuto da make/unmake per il colore di turno
+        return board_obj.in_check
+    return _is_king_attacked(board_obj, white)
+
+def _is_king_attacked(board_obj, white):
     kr, kc = find_king_position(board_obj, white)
     if kr is None:
         return False
@@ -296,27 +238,216 @@ def can_move_piece(board_obj, piece):
     return True
 
 def get_all_legal_moves(board_obj, white=True):
+    if board_obj.use_bitboards:
+        return _get_all_legal_moves_bb(board_obj, white)
     out = []
-    for r in range(BOARD_SIZE):
-        for c in range(BOARD_SIZE):
-            p = board_obj.board[r][c]
-            if p == EMPTY:
-                continue
-            if white and not is_white_piece(p):
-                continue
-            if (not white) and not is_black_piece(p):
-                continue
-            candidate = get_legal_moves_for_square(board_obj, r, c)
-            for (rr, cc) in candidate:
-                out.append((r, c, rr, cc))
+    # Solo le caselle occupate dal colore richiesto, nell'ordine della scacchiera
+    own = board_obj.white_squares if white else board_obj.black_squares
+    for sq in sorted(own):
+        r, c = divmod(sq, BOARD_SIZE)
+        candidate = get_legal_moves_for_square(board_obj, r, c)
+        for (rr, cc) in candidate:
+            out.append((r, c, rr, cc))
     return out
 
+def get_all_legal_moves_encoded(board_obj, white=True, buf=None):
+    """
+    Come get_all_legal_moves, ma con le mosse codificate come interi
+    (vedi move_encoding) in un array('H'). Se buf è dato viene svuotato e
+    riutilizzato, così la ricerca non alloca una lista per ogni nodo.
+    """
+    if buf is None:
+        buf = array('H')
+    else:
+        del buf[:]
+    if not board_obj.use_bitboards:
+        for (fr, fc, tr, tc) in get_all_legal_moves(board_obj, white):
+            buf.append(encode_move(board_obj, fr, fc, tr, tc))
+        return buf
+    if white != board_obj.turn_white:
+        return buf
+    if board_obj.in_check:
+        return get_evasions(board_obj, white, buf)
+    bstate = board_obj.board
+    pins = _checks_and_pins_bb(board_obj, white)
+    own = board_obj.white_bb if white else board_obj.black_bb
+    while own:
+        low = own & -own
+        own ^= low
+        sq = low.bit_length() - 1
+        p = bstate[sq >> 3][sq & 7]
+        _append_encoded_bb(board_obj, buf, sq, p, _legal_target_mask_bb(board_obj, sq, p, pins))
+    return buf
+
+def _append_encoded_bb(board_obj, buf, sq, p, targets):
+    """
+    Aggiunge a buf le mosse codificate del pezzo p in sq verso le caselle di
+    'targets', con i flag ricavati dalle maschere.
+    """
+    white = p & 1
+    enemy = board_obj.black_bb if white else board_obj.white_bb
+    push_mask = 0
+    promo_mask = 0
+    castling = False
+    if p == WHITE_BISON or p == BLACK_BISON:
+        push_mask = board_obj.piece_bb[BLACK_PAWN if white else WHITE_PAWN]
+    elif p == WHITE_PAWN:
+        promo_mask = RANK_BB[0]
+    elif p == BLACK_PAWN:
+        promo_mask = RANK_BB[BOARD_SIZE - 1]
+    elif p == WHITE_KING or p == BLACK_KING:
+        castling = True
+    while targets:
+        low = targets & -targets
+        targets ^= low
+        t = low.bit_length() - 1
+        move = sq | (t << MOVE_TO_SHIFT)
+        if low & enemy:
+            move |= MOVE_FLAG_CAPTURE
+            if low & push_mask:
+                move |= MOVE_FLAG_BISON_PUSH
+        if low & promo_mask:
+            move |= MOVE_FLAG_PROMOTION
+        elif castling and abs((t & 7) - (sq & 7)) == 2:
+            move |= MOVE_FLAG_CASTLING
+        buf.append(move)
+
+def get_evasions(board_obj, white=True, buf=None, count_only=False):
+    """
+    Mosse legali (codificate, in un array('H')) del colore 'white' sotto
+    scacco: mosse del Re, catture del pezzo che dà scacco e interposizioni
+    sulla linea di scacco; con scacco doppio si guardano solo il Re e i pezzi
+    irregolari. Restano valide le regole dei nativi: i pezzi congelati dallo
+    Sciamano non muovono e le catture di pedoni del Bisonte si verificano
+    eseguendole, perché il pedone spinto può coprire lo scacco.
+    Con count_only=True non costruisce la lista e ritorna la coppia
+    (mosse del Re, altre mosse).
+    """
+    if not count_only:
+        if buf is None:
+            buf = array('H')
+        else:
+            del buf[:]
+    if white != board_obj.turn_white or board_obj.game_over:
+        return (0, 0) if count_only else buf
+    if not board_obj.use_bitboards:
+        # Backend a matrice: stesse mosse, ricavate dalla generazione completa
+        moves = get_all_legal_moves(board_obj, white)
+        if count_only:
+            king_moves = 0
+            for (fr, fc, tr, tc) in moves:
+                if board_obj.board[fr][fc] in (WHITE_KING, BLACK_KING):
+                    king_moves += 1
+            return (king_moves, len(moves) - king_moves)
+        for (fr, fc, tr, tc) in moves:
+            buf.append(encode_move(board_obj, fr, fc, tr, tc))
+        return buf
+
+    bstate = board_obj.board
+    pins = _checks_and_pins_bb(board_obj, white)
+    evasion = pins[0]
+    if white:
+        king, irregular = WHITE_KING, board_obj.piece_bb[WHITE_BISON] | board_obj.piece_bb[WHITE_TOTEM]
+        own = board_obj.white_bb
+    else:
+        king, irregular = BLACK_KING, board_obj.piece_bb[BLACK_BISON] | board_obj.piece_bb[BLACK_TOTEM]
+        own = board_obj.black_bb
+    if not evasion:
+        # Scacco doppio: nessuna cattura o interposizione semplice basta
+        own &= irregular | board_obj.piece_bb[king]
+    king_moves = 0
+    other_moves = 0
+    while own:
+        low = own & -own
+        own ^= low
+        sq = low.bit_length() - 1
+        p = bstate[sq >> 3][sq & 7]
+        if p == king or low & irregular:
+            targets = _legal_target_mask_bb(board_obj, sq, p, pins)
+        else:
+            targets = _legal_target_mask_bb(board_obj, sq, p, pins, evasion)
+        if not targets:
+            continue
+        if not count_only:
+            _append_encoded_bb(board_obj, buf, sq, p, targets)
+        elif p == king:
+            king_moves += popcount(targets)
+        else:
+            other_moves += popcount(targets)
+    return (king_moves, other_moves) if count_only else buf
+
+def count_legal_moves(board_obj, white=True):
+    """
+    Numero di mosse legali del colore indicato, senza costruire la lista.
+    """
+    if white != board_obj.turn_white or board_obj.game_over:
+        return 0
+    if not board_obj.use_bitboards:
+        total = 0
+        own = board_obj.white_squares if white else board_obj.black_squares
+        for sq in sorted(own):
+            total += len(get_legal_moves_for_square(board_obj, sq >> 3, sq & 7))
+        return total
+    if board_obj.in_check:
+        (king_moves, other_moves) = get_evasions(board_obj, white, count_only=True)
+        return king_moves + other_moves
+    bstate = board_obj.board
+    pins = _checks_and_pins_bb(board_obj, white)
+    own = board_obj.white_bb if white else board_obj.black_bb
+    total = 0
+    while own:
+        low = own & -own
+        own ^= low
+        sq = low.bit_length() - 1
+        total += popcount(_legal_target_mask_bb(board_obj, sq, bstate[sq >> 3][sq & 7], pins))
+    return total
+
+def has_any_legal_move(board_obj, white=True):
+    """
+    True se il colore indicato ha almeno una mossa legale: si ferma al primo
+    pezzo che può muovere, guardando il Re (che richiede più verifiche) per ultimo.
+    """
+    if white != board_obj.turn_white or board_obj.game_over:
+        return False
+    king_sq = board_obj.white_king_sq if white else board_obj.black_king_sq
+    if not board_obj.use_bitboards:
+        own = board_obj.white_squares if white else board_obj.black_squares
+        for sq in sorted(own):
+            if sq != king_sq and get_legal_moves_for_square(board_obj, sq >> 3, sq & 7):
+                return True
+        if king_sq is not None:
+            return bool(get_legal_moves_for_square(board_obj, king_sq >> 3, king_sq & 7))
+        return False
+    bstate = board_obj.board
+    pins = _checks_and_pins_bb(board_obj, white)
+    own = board_obj.white_bb if white else board_obj.black_bb
+    if king_sq is not None:
+        own ^= 1 << king_sq
+    while own:
+        low = own & -own
+        own ^= low
+        sq = low.bit_length() - 1
+        if _legal_target_mask_bb(board_obj, sq, bstate[sq >> 3][sq & 7], pins):
+            return True
+    if king_sq is not None:
+        return bool(_legal_target_mask_bb(board_obj, king_sq, bstate[king_sq >> 3][king_sq & 7], pins))
+    return False
+
+def make_encoded_move(board_obj, move):
+    """
+    make_move_in_place per una mossa codificata come intero.
+    """
+    (fr, fc, tr, tc) = decode_move(move)
+    return make_move_in_place(board_obj, fr, fc, tr, tc)
+
 def get_legal_moves_for_square(board_obj, r, c):
     p = board_obj.board[r][c]
     if p == EMPTY:
         return []
     if not can_move_piece(board_obj, p):
         return []
+    if board_obj.use_bitboards:
+        return _legal_targets_bb(board_obj, r, c, p)
 
     # [SHAMAN FREEZE RULE]
     if is_piece_frozen_by_enemy_shaman(board_obj, r, c):
@@ -329,76 +460,473 @@ def get_legal_moves_for_square(board_obj, r, c):
             real_moves.append((rr, cc))
 
     # Arrocco (classici / nativi)
-    if p == WHITE_KING and board_obj.white_faction == "classici" and board_obj.turn_white \
-       and not board_obj.white_king_moved and (r, c) == (7, 4):
-        if (not board_obj.white_right_rook_moved) \
-           and board_obj.board[7][5] == EMPTY and board_obj.board[7][6] == EMPTY \
-           and board_obj.board[7][7] == WHITE_ROOK \
-           and (not is_in_check(board_obj, True)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,5)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,6)):
-            real_moves.append((7, 6))
-        if (not board_obj.white_left_rook_moved) \
-           and (board_obj.board[7][1] == EMPTY and board_obj.board[7][2] == EMPTY and board_obj.board[7][3] == EMPTY) \
-           and board_obj.board[7][0] == WHITE_ROOK \
-           and (not is_in_check(board_obj, True)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,3)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,2)):
-            real_moves.append((7, 2))
-
-    if p == BLACK_KING and board_obj.black_faction == "classici" and (not board_obj.turn_white) \
-       and not board_obj.black_king_moved and (r, c) == (0, 4):
-        if (not board_obj.black_right_rook_moved) \
-           and board_obj.board[0][5] == EMPTY and board_obj.board[0][6] == EMPTY \
-           and board_obj.board[0][7] == BLACK_ROOK \
-           and (not is_in_check(board_obj, False)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,5)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,6)):
-            real_moves.append((0, 6))
-        if (not board_obj.black_left_rook_moved) \
-           and (board_obj.board[0][1] == EMPTY and board_obj.board[0][2] == EMPTY and board_obj.board[0][3] == EMPTY) \
-           and board_obj.board[0][0] == BLACK_ROOK \
-           and (not is_in_check(board_obj, False)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,3)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,2)):
-            real_moves.append((0, 2))
-
-    if p == WHITE_KING and board_obj.white_faction == "nativi" and board_obj.turn_white \
-       and not board_obj.white_king_moved and (r, c) == (7, 4):
-        if (not board_obj.white_right_rook_moved) \
-           and board_obj.board[7][5] == EMPTY and board_obj.board[7][6] == EMPTY \
-           and board_obj.board[7][7] == WHITE_TOTEM \
-           and (not is_in_check(board_obj, True)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,5)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,6)):
-            real_moves.append((7, 6))
-        if (not board_obj.white_left_rook_moved) \
-           and (board_obj.board[7][1] == EMPTY and board_obj.board[7][2] == EMPTY and board_obj.board[7][3] == EMPTY) \
-           and board_obj.board[7][0] == WHITE_TOTEM \
-           and (not is_in_check(board_obj, True)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,3)) \
-           and (not does_move_leave_king_in_check(board_obj, 7,4,7,2)):
-            real_moves.append((7, 2))
-
-    if p == BLACK_KING and board_obj.black_faction == "nativi" and (not board_obj.turn_white) \
-       and not board_obj.black_king_moved and (r, c) == (0, 4):
-        if (not board_obj.black_right_rook_moved) \
-           and board_obj.board[0][5] == EMPTY and board_obj.board[0][6] == EMPTY \
-           and board_obj.board[0][7] == BLACK_TOTEM \
-           and (not is_in_check(board_obj, False)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,5)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,6)):
-            real_moves.append((0, 6))
-        if (not board_obj.black_left_rook_moved) \
-           and (board_obj.board[0][1] == EMPTY and board_obj.board[0][2] == EMPTY and board_obj.board[0][3] == EMPTY) \
-           and board_obj.board[0][0] == BLACK_TOTEM \
-           and (not is_in_check(board_obj, False)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,3)) \
-           and (not does_move_leave_king_in_check(board_obj, 0,4,0,2)):
-            real_moves.append((0, 2))
+    if p == WHITE_KING or p == BLACK_KING:
+        real_moves += _castling_moves(board_obj, p, r, c)
 
     return real_moves
 
+def _get_all_legal_moves_bb(board_obj, white):
+    """
+    Come get_all_legal_moves, ma scorre solo le caselle occupate dal colore
+    richiesto usando i bitboard. Scacchi e inchiodature si calcolano una
+    volta sola per la posizione.
+    """
+    if white != board_obj.turn_white:
+        # can_move_piece rifiuterebbe ogni pezzo
+        return []
+    if board_obj.in_check:
+        return decode_moves(get_evasions(board_obj, white))
+    bstate = board_obj.board
+    out = []
+    pins = _checks_and_pins_bb(board_obj, white)
+    own = board_obj.white_bb if white else board_obj.black_bb
+    while own:
+        low = own & -own
+        own ^= low
+        sq = low.bit_length() - 1
+        r, c = divmod(sq, BOARD_SIZE)
+        targets = _legal_target_mask_bb(board_obj, sq, bstate[r][c], pins)
+        while targets:
+            t = targets & -targets
+            targets ^= t
+            rr, cc = divmod(t.bit_length() - 1, BOARD_SIZE)
+            out.append((r, c, rr, cc))
+    return out
+
+def _checks_and_pins_bb(board_obj, white):
+    """
+    Analisi del Re 'white' nella posizione corrente:
+    ritorna (evasion, pinned, pin_lines)
+      - evasion: caselle d'arrivo che risolvono lo scacco per un pezzo
+        diverso dal Re (tutte se non c'è scacco, nessuna con scacco doppio,
+        altrimenti cattura dell'attaccante o interposizione se scorre);
+      - pinned: pezzi amici inchiodati sul Re;
+      - pin_lines: per ogni pezzo inchiodato (sq), le caselle su cui può muovere.
+    """
+    king_sq = board_obj.white_king_sq if white else board_obj.black_king_sq
+    if king_sq is None:
+        # Senza Re non c'è scacco: ogni mossa è ammessa
+        return (FULL_BB, 0, {})
+
+    own = board_obj.white_bb if white else board_obj.black_bb
+    occ = board_obj.white_bb | board_obj.black_bb
+    orthogonal, diagonal = slider_attackers_bb(board_obj, not white)
+
+    if white == board_obj.turn_white and not board_obj.in_check:
+        checkers = 0
+    else:
+        checkers = attackers_to_bb(board_obj, king_sq, not white, occ)
+    if not checkers:
+        evasion = FULL_BB
+    elif checkers & (checkers - 1):
+        evasion = 0
+    else:
+        evasion = checkers
+        sliding = (rook_attacks_bb(king_sq, occ) & orthogonal) | (bishop_attacks_bb(king_sq, occ) & diagonal)
+        if checkers & sliding:
+            evasion |= BETWEEN_BB[king_sq][checkers.bit_length() - 1]
+
+    # Inchiodature: pezzi che scorrono allineati al Re con un solo pezzo
+    # (amico) in mezzo
+    pinned = 0
+    pin_lines = {}
+    snipers = (rook_attacks_bb(king_sq, 0) & orthogonal) | (bishop_attacks_bb(king_sq, 0) & diagonal)
+    while snipers:
+        low = snipers & -snipers
+        snipers ^= low
+        s = low.bit_length() - 1
+        blockers = BETWEEN_BB[king_sq][s] & occ
+        if blockers and not (blockers & (blockers - 1)) and (blockers & own):
+            pinned |= blockers
+            # Il pezzo resta tra Re e attaccante (cattura inclusa): uno
+            # Sciamano non può saltare oltre il Re lungo la stessa linea
+            pin_lines[blockers.bit_length() - 1] = BETWEEN_BB[king_sq][s] | low
+    return (evasion, pinned, pin_lines)
+
+def _irregular_targets_bb(board_obj, sq, p, white, targets):
+    """
+    Sottoinsieme di 'targets' che va verificato eseguendo la mossa: tutte le
+    mosse del Re, le catture di pedoni del Bisonte (spinta) e le mosse del
+    Totem fuori dall'anello del Re (geometria ereditata).
+    """
+    if p == WHITE_KING or p == BLACK_KING:
+        return targets
+    if p == WHITE_BISON or p == BLACK_BISON:
+        return targets & board_obj.piece_bb[BLACK_PAWN if white else WHITE_PAWN]
+    if p == WHITE_TOTEM or p == BLACK_TOTEM:
+        return targets & ~KING_ATTACKS_BB[sq]
+    return 0
+
+def _legal_targets_bb(board_obj, r, c, p):
+    """
+    Mosse legali del pezzo 'p' (del colore di turno) in (r, c) come lista di
+    caselle d'arrivo, arrocco compreso.
+    """
+    out = []
+    targets = _legal_target_mask_bb(board_obj, r * BOARD_SIZE + c, p)
+    while targets:
+        low = targets & -targets
+        targets ^= low
+        out.append(divmod(low.bit_length() - 1, BOARD_SIZE))
+    return out
+
+def _legal_target_mask_bb(board_obj, sq, p, pins=None, target_mask=FULL_BB):
+    """
+    Maschera delle caselle d'arrivo legali del pezzo 'p' (del colore di turno)
+    in sq, calcolate sui bitboard e filtrate con scacchi e inchiodature.
+    Si esegue la mossa per verificarla solo nei casi irregolari: mosse del Re,
+    spinte del Bisonte (il pedone spinto cambia l'occupazione) e mosse del
+    Totem con la geometria ereditata.
+    Con target_mask si considerano solo le caselle d'arrivo indicate
+    (ad esempio i pezzi avversari per le sole catture); l'arrocco viene
+    aggiunto solo senza restrizioni.
+    """
+    if board_obj.game_over:
+        # does_move_leave_king_in_check rifiuta ogni mossa a partita finita
+        return 0
+    white = is_white_piece(p)
+    if white:
+        own, enemy = board_obj.white_bb, board_obj.black_bb
+    else:
+        own, enemy = board_obj.black_bb, board_obj.white_bb
+
+    # [SHAMAN FREEZE RULE]
+    if (board_obj.white_frozen_bb if white else board_obj.black_frozen_bb) >> sq & 1:
+        return 0
+
+    targets = piece_targets_bb(board_obj, sq, p, own, enemy) & target_mask
+
+    slow = _irregular_targets_bb(board_obj, sq, p, white, targets)
+    if slow == targets:
+        legal = 0
+    else:
+        if pins is None:
+            pins = _checks_and_pins_bb(board_obj, white)
+        evasion, pinned, pin_lines = pins
+        legal = targets & ~slow & evasion
+        if pinned & (1 << sq):
+            legal &= pin_lines[sq]
+
+    r, c = divmod(sq, BOARD_SIZE)
+    while slow:
+        low = slow & -slow
+        slow ^= low
+        rr, cc = divmod(low.bit_length() - 1, BOARD_SIZE)
+        if not does_move_leave_king_in_check(board_obj, r, c, rr, cc):
+            legal |= low
+
+    if (p == WHITE_KING or p == BLACK_KING) and target_mask == FULL_BB:
+        for (rr, cc) in _castling_moves(board_obj, p, r, c):
+            legal |= 1 << (rr * BOARD_SIZE + cc)
+    return legal
+
+# -------------------------------------------------------
+# Sole catture (per la quiescence search)
+# -------------------------------------------------------
+def mvv_lva_score(board_obj, move):
+    """
+    Ordinamento MVV-LVA di una mossa codificata: prima la vittima più
+    preziosa, poi l'attaccante meno prezioso. Le mosse che non catturano
+    (spinte del Bisonte comprese: il pedone non viene preso) valgono -1.
+    """
+    to = (move >> MOVE_TO_SHIFT) & MOVE_SQUARE_MASK
+    bstate = board_obj.board
+    victim = bstate[to >> 3][to & 7]
+    if victim == EMPTY or move & MOVE_FLAG_BISON_PUSH:
+        return -1
+    frm = move & MOVE_SQUARE_MASK
+    attacker = bstate[frm >> 3][frm & 7]
+    return 100 * PIECE_VALUE.get(victim, 0) - PIECE_VALUE.get(attacker, 0)
+
+def get_legal_captures(board_obj, white=True, buf=None):
+    """
+    Ritorna le sole catture legali del colore indicato, codificate come interi
+    in un array('H') (riutilizza buf se dato), in ordine MVV-LVA.
+    La legalità viene verificata solo sulle catture: le mosse tranquille
+    non vengono nemmeno generate.
+    """
+    out = []
+    if white == board_obj.turn_white and not board_obj.game_over:
+        if board_obj.use_bitboards:
+            bstate = board_obj.board
+            own = board_obj.white_bb if white else board_obj.black_bb
+            enemy = board_obj.black_bb if white else board_obj.white_bb
+            pins = _checks_and_pins_bb(board_obj, white)
+            while own:
+                low = own & -own
+                own ^= low
+                sq = low.bit_length() - 1
+                p = bstate[sq >> 3][sq & 7]
+                _append_encoded_bb(board_obj, out, sq, p,
+                                   _legal_target_mask_bb(board_obj, sq, p, pins, enemy))
+        else:
+            for move in _pseudo_moves(board_obj, white, True):
+                (fr, fc, tr, tc) = decode_move(move)
+                if not does_move_leave_king_in_check(board_obj, fr, fc, tr, tc):
+                    out.append(move)
+        # sort è stabile: a parità di punteggio resta l'ordine della scacchiera
+        out.sort(key=lambda mv: mvv_lva_score(board_obj, mv), reverse=True)
+    if buf is None:
+        return array('H', out)
+    del buf[:]
+    buf.extend(out)
+    return buf
+
+# -------------------------------------------------------
+# Generazione a stadi (per pvs_search)
+# -------------------------------------------------------
+def _pseudo_moves(board_obj, white, captures):
+    """
+    Mosse pseudo-legali codificate del colore indicato: solo catture
+    (captures=True) oppure solo mosse su casella vuota, arrocco escluso.
+    I pezzi congelati dallo Sciamano non generano mosse.
+    """
+    bstate = board_obj.board
+    out = []
+    if board_obj.use_bitboards:
+        own = board_obj.white_bb if white else board_obj.black_bb
+        enemy = board_obj.black_bb if white else board_obj.white_bb
+        target_mask = enemy if captures else FULL_BB & ~(own | enemy)
+        # I pezzi congelati non muovono
+        pieces = own & ~(board_obj.white_frozen_bb if white else board_obj.black_frozen_bb)
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            sq = low.bit_length() - 1
+            p = bstate[sq >> 3][sq & 7]
+            targets = piece_targets_bb(board_obj, sq, p, own, enemy) & target_mask
+            _append_encoded_bb(board_obj, out, sq, p, targets)
+    else:
+        own = board_obj.white_squares if white else board_obj.black_squares
+        for sq in sorted(own):
+            r, c = divmod(sq, BOARD_SIZE)
+            if is_piece_frozen_by_enemy_shaman(board_obj, r, c):
+                continue
+            for (rr, cc) in get_all_pseudo_moves_for_square(board_obj, white, r, c):
+                occupant = bstate[rr][cc]
+                if captures:
+                    if occupant != EMPTY and is_white_piece(occupant) != white:
+                        out.append(encode_move(board_obj, r, c, rr, cc))
+                elif occupant == EMPTY:
+                    out.append(encode_move(board_obj, r, c, rr, cc))
+    return out
+
+def _is_pseudo_move_legal(board_obj, move, pins):
+    """
+    Verifica una mossa di _pseudo_moves. Sui bitboard basta confrontarla con
+    le maschere di scacco/inchiodatura (pins), tranne nei casi irregolari.
+    """
+    if pins is None:
+        (fr, fc, tr, tc) = decode_move(move)
+        return not does_move_leave_king_in_check(board_obj, fr, fc, tr, tc)
+    sq = move & MOVE_SQUARE_MASK
+    t = 1 << ((move >> MOVE_TO_SHIFT) & MOVE_SQUARE_MASK)
+    p = board_obj.board[sq >> 3][sq & 7]
+    if _irregular_targets_bb(board_obj, sq, p, is_white_piece(p), t):
+        (fr, fc, tr, tc) = decode_move(move)
+        return not does_move_leave_king_in_check(board_obj, fr, fc, tr, tc)
+    evasion, pinned, pin_lines = pins
+    if not (evasion & t):
+        return False
+    if pinned & (1 << sq) and not (pin_lines[sq] & t):
+        return False
+    return True
+
+def iter_staged_moves(board_obj, first_move=None, quiet_key=None):
+    """
+    Generatore delle mosse legali (codificate) del colore di turno, prodotte
+    a stadi:
+      1) first_move (mossa della TT / variante principale), se legale;
+      2) catture "buone" in ordine MVV-LVA (vittima che vale almeno quanto
+         l'attaccante, oppure casella non difesa);
+      3) mosse tranquille e arrocchi;
+      4) le restanti catture.
+    Le spinte del Bisonte non tolgono materiale e stanno con le mosse
+    tranquille; quiet_key (funzione mossa -> punteggio, ad esempio killer e
+    history della ricerca) le ordina dal punteggio più alto.
+    Ogni stadio viene generato solo quando serve e la legalità di una mossa
+    si verifica solo prima di restituirla: se la ricerca taglia presto, il
+    resto non viene mai calcolato. Sotto scacco si usano le evasioni di
+    get_evasions (catture, poi le altre). La scacchiera deve essere nello stesso
+    stato a ogni ripresa del generatore.
+    """
+    if board_obj.game_over:
+        return
+    white = board_obj.turn_white
+    bstate = board_obj.board
+
+    if first_move is not None:
+        (fr, fc, tr, tc) = decode_move(first_move)
+        p = bstate[fr][fc]
+        if p != EMPTY and is_white_piece(p) == white \
+           and (tr, tc) in get_legal_moves_for_square(board_obj, fr, fc):
+            # I flag vengono ricalcolati: la mossa può arrivare da un'altra posizione
+            first_move = encode_move(board_obj, fr, fc, tr, tc)
+            yield first_move
+        else:
+            first_move = None
+
+    if board_obj.in_check and board_obj.use_bitboards:
+        # Sotto scacco le evasioni sono poche: si generano tutte, già legali,
+        # catture in ordine MVV-LVA e poi le altre
+        captures = []
+        quiets = []
+        for mv in get_evasions(board_obj, white):
+            if mv == first_move:
+                continue
+            if mv & MOVE_FLAG_CAPTURE and not mv & MOVE_FLAG_BISON_PUSH:
+                captures.append(mv)
+            else:
+                quiets.append(mv)
+        captures.sort(key=lambda mv: mvv_lva_score(board_obj, mv), reverse=True)
+        if quiet_key is not None:
+            quiets.sort(key=quiet_key, reverse=True)
+        yield from captures
+        yield from quiets
+        return
+
+    # Maschere di scacco e inchiodatura: calcolate alla prima verifica
+    pins = None
+    need_pins = board_obj.use_bitboards
+
+    captures = _pseudo_moves(board_obj, white, True)
+    captures.sort(key=lambda mv: mvv_lva_score(board_obj, mv), reverse=True)
+    bad_captures = []
+    pushes = []
+    for mv in captures:
+        if mv == first_move:
+            continue
+        if mv & MOVE_FLAG_BISON_PUSH:
+            pushes.append(mv)
+            continue
+        frm = mv & MOVE_SQUARE_MASK
+        to = (mv >> MOVE_TO_SHIFT) & MOVE_SQUARE_MASK
+        tr, tc = to >> 3, to & 7
+        if PIECE_VALUE.get(bstate[tr][tc], 0) < PIECE_VALUE.get(bstate[frm >> 3][frm & 7], 0) \
+           and is_square_attacked(board_obj, tr, tc, not white):
+            bad_captures.append(mv)
+            continue
+        if need_pins:
+            pins = _checks_and_pins_bb(board_obj, white)
+            need_pins = False
+        if _is_pseudo_move_legal(board_obj, mv, pins):
+            yield mv
+
+    quiets = _pseudo_moves(board_obj, white, False)
+    quiets.extend(pushes)
+    if quiet_key is not None:
+        quiets.sort(key=quiet_key, reverse=True)
+    for mv in quiets:
+        if mv == first_move:
+            continue
+        if need_pins:
+            pins = _checks_and_pins_bb(board_obj, white)
+            need_pins = False
+        if _is_pseudo_move_legal(board_obj, mv, pins):
+            yield mv
+
+    king_sq = board_obj.white_king_sq if white else board_obj.black_king_sq
+    if king_sq is not None:
+        kr, kc = divmod(king_sq, BOARD_SIZE)
+        for (rr, cc) in _castling_moves(board_obj, bstate[kr][kc], kr, kc):
+            mv = king_sq | ((rr * BOARD_SIZE + cc) << MOVE_TO_SHIFT) | MOVE_FLAG_CASTLING
+            if mv != first_move:
+                yield mv
+
+    for mv in bad_captures:
+        if need_pins:
+            pins = _checks_and_pins_bb(board_obj, white)
+            need_pins = False
+        if _is_pseudo_move_legal(board_obj, mv, pins):
+            yield mv
+
+def _castling_moves(board_obj, p, r, c):
+    """
+    Caselle d'arrivo dell'arrocco (classici con la Torre, nativi con il Totem)
+    per il Re 'p' in (r, c). La legalità si decide con un solo controllo sulle
+    caselle attraversate dal Re (partenza compresa): nessuna può essere attaccata.
+    """
+    out = []
+    if p == WHITE_KING:
+        white = True
+        rights = board_obj.castling_rights & WHITE_CASTLING
+    elif p == BLACK_KING:
+        white = False
+        rights = board_obj.castling_rights & BLACK_CASTLING
+    else:
+        return out
+    if not rights or white != board_obj.turn_white:
+        return out
+
+    sq = r * BOARD_SIZE + c
+    faction = board_obj.white_faction if white else board_obj.black_faction
+    partner = CASTLING_PARTNER[(white, faction)]
+    occupied = board_obj.white_bb | board_obj.black_bb
+    bstate = board_obj.board
+    king_safe = None
+    for (right, _white, king_from, king_to, partner_from, _partner_to, empty_bb, transit) in CASTLING_TABLE:
+        if not (rights & right) or sq != king_from:
+            continue
+        if occupied & empty_bb or bstate[partner_from >> 3][partner_from & 7] != partner:
+            continue
+        if king_safe is None:
+            king_safe = not is_square_attacked(board_obj, r, c, not white)
+        if not king_safe:
+            break
+        for t in transit:
+            if is_square_attacked(board_obj, t >> 3, t & 7, not white):
+                break
+        else:
+            out.append(divmod(king_to, BOARD_SIZE))
+    return out
+
+# -------------------------------------------------------
+# Cache delle mosse legali (GUI, make_move, fine partita)
+# -------------------------------------------------------
+# Numero massimo di posizioni in CustomBoard.legal_move_cache: oltre questo
+# limite si scarta la posizione inserita per prima
+LEGAL_MOVE_CACHE_SIZE = 64
+
+class LegalMoves:
+    """
+    Mosse legali del colore di turno in una posizione: lista (fr, fc, tr, tc),
+    insieme per la validazione e caselle d'arrivo raggruppate per pezzo.
+    """
+    __slots__ = ("moves", "move_set", "by_square")
+
+    def __init__(self, moves):
+        self.moves = moves
+        self.move_set = set(moves)
+        self.by_square = {}
+        for (fr, fc, tr, tc) in moves:
+            self.by_square.setdefault((fr, fc), []).append((tr, tc))
+
+_NO_LEGAL_MOVES = LegalMoves([])
+
+def get_cached_legal_moves(board_obj):
+    """
+    LegalMoves della posizione corrente, letto dalla cache del CustomBoard
+    (chiave Zobrist) o generato e memorizzato la prima volta.
+    Da usare fuori dalla ricerca: la ricerca genera le mosse per conto suo.
+    """
+    if board_obj.game_over:
+        return _NO_LEGAL_MOVES
+    cache = board_obj.legal_move_cache
+    key = board_obj.zobrist_key
+    entry = cache.get(key)
+    if entry is None:
+        entry = LegalMoves(get_all_legal_moves(board_obj, board_obj.turn_white))
+        if len(cache) >= LEGAL_MOVE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[key] = entry
+    return entry
+
+def get_cached_legal_moves_for_square(board_obj, r, c):
+    """
+    Come get_legal_moves_for_square, ma dalla cache delle mosse legali.
+    """
+    return list(get_cached_legal_moves(board_obj).by_square.get((r, c), ()))
+
 def make_move(board_obj, fr, fc, tr, tc, promotion_piece=None):
     if board_obj.game_over:
         return False
@@ -406,12 +934,11 @@ def make_move(board_obj, fr, fc, tr, tc, promotion_piece=None):
     if not can_move_piece(board_obj, mover):
         return False
 
-    valid_moves = get_legal_moves_for_square(board_obj, fr, fc)
-    if (tr, tc) not in valid_moves:
+    if (fr, fc, tr, tc) not in get_cached_legal_moves(board_obj).move_set:
         return False
 
     move_info = make_move_in_place(board_obj, fr, fc, tr, tc, promotion_piece)
-    if not move_info["move_done"]:
+    if not move_info.move_done:
         return False
 
     move_str = f"{mover}@({fr},{fc})->({tr},{tc})"
@@ -437,8 +964,35 @@ piece_class_map = {
     BLACK_TOTEM:  "TOTEM"
 }
 
-def make_move_in_place(board_obj, fr, fc, tr, tc, promotion_piece=None):
-    move_info = {"move_done": False}
+class MoveUndo:
+    """
+    Record compatto restituito da make_move_in_place: contiene solo le caselle
+    toccate dalla mossa (partenza, arrivo, spinta del Bisonte, partner
+    dell'arrocco), il pezzo catturato e i diritti di arrocco precedenti,
+    così undo_move_in_place li ripristina in O(1) senza copiare la scacchiera.
+    """
+    __slots__ = (
+        "move_done",
+        "fr", "fc", "tr", "tc",
+        "mover", "captured", "placed",
+        "push_r", "push_c",
+        "partner", "partner_fr", "partner_fc", "partner_tr", "partner_tc",
+        "castling_rights",
+        "white_totem_inherited", "black_totem_inherited",
+        "zobrist_key", "in_check",
+    )
+
+    def __init__(self):
+        self.move_done = False
+
+def make_move_in_place(board_obj, fr, fc, tr, tc, promotion_piece=None, update_check=True):
+    """
+    Esegue la mossa senza validarne la legalità e ritorna il MoveUndo.
+    Con update_check=False il flag in_check non viene aggiornato (resta quello
+    della posizione di partenza fino all'undo): serve alle sole prove di
+    legalità, che guardano il Re di chi ha mosso.
+    """
+    move_info = MoveUndo()
     if board_obj.game_over:
         return move_info
 
@@ -446,140 +1000,158 @@ def make_move_in_place(board_obj, fr, fc, tr, tc, promotion_piece=None):
     if not can_move_piece(board_obj, mover):
         return move_info
 
-    move_info["board_before"] = [row[:] for row in board_obj.board]
-    move_info["white_king_moved"] = board_obj.white_king_moved
-    move_info["white_left_rook_moved"] = board_obj.white_left_rook_moved
-    move_info["white_right_rook_moved"] = board_obj.white_right_rook_moved
-    move_info["black_king_moved"] = board_obj.black_king_moved
-    move_info["black_left_rook_moved"] = board_obj.black_left_rook_moved
-    move_info["black_right_rook_moved"] = board_obj.black_right_rook_moved
-
-    move_info["white_totem_inherited"] = board_obj.white_totem_inherited
-    move_info["black_totem_inherited"] = board_obj.black_totem_inherited
-
-    move_info["turn_white"] = board_obj.turn_white
-    move_info["game_over"] = board_obj.game_over
-    move_info["winner"] = board_obj.winner
-
-    ok = _apply_normal_move(board_obj, fr, fc, tr, tc, promotion_piece)
+    move_info.fr = fr
+    move_info.fc = fc
+    move_info.tr = tr
+    move_info.tc = tc
+    move_info.mover = mover
+    move_info.captured = board_obj.board[tr][tc]
+    move_info.placed = mover
+    move_info.push_r = -1
+    move_info.partner = EMPTY
+    move_info.castling_rights = board_obj.castling_rights
+    move_info.white_totem_inherited = board_obj.white_totem_inherited
+    move_info.black_totem_inherited = board_obj.black_totem_inherited
+    move_info.zobrist_key = board_obj.zobrist_key
+    move_info.in_check = board_obj.in_check
+
+    # _apply_normal_move valida la mossa prima di toccare la scacchiera
+    ok = _apply_normal_move(board_obj, move_info)
     if not ok:
         return move_info
 
+    # Chiave: diritti di arrocco e poteri ereditati cambiati, poi il turno
+    key = board_obj.zobrist_key
+    if board_obj.castling_rights != move_info.castling_rights:
+        key ^= ZOBRIST_CASTLING[move_info.castling_rights]
+        key ^= ZOBRIST_CASTLING[board_obj.castling_rights]
+    if board_obj.white_totem_inherited != move_info.white_totem_inherited:
+        key ^= ZOBRIST_WHITE_INHERITED[move_info.white_totem_inherited]
+        key ^= ZOBRIST_WHITE_INHERITED[board_obj.white_totem_inherited]
+    if board_obj.black_totem_inherited != move_info.black_totem_inherited:
+        key ^= ZOBRIST_BLACK_INHERITED[move_info.black_totem_inherited]
+        key ^= ZOBRIST_BLACK_INHERITED[board_obj.black_totem_inherited]
+    board_obj.zobrist_key = key ^ ZOBRIST_SIDE
+
+    if update_check:
+        board_obj.in_check = gives_check(board_obj, move_info)
     board_obj.turn_white = not board_obj.turn_white
-    move_info["move_done"] = True
+    move_info.move_done = True
     return move_info
 
 def undo_move_in_place(board_obj, move_info):
-    if not move_info.get("move_done", False):
+    if not move_info.move_done:
         return
 
-    board_obj.board = [row[:] for row in move_info["board_before"]]
-    board_obj.white_king_moved = move_info["white_king_moved"]
-    board_obj.white_left_rook_moved = move_info["white_left_rook_moved"]
-    board_obj.white_right_rook_moved = move_info["white_right_rook_moved"]
-    board_obj.black_king_moved = move_info["black_king_moved"]
-    board_obj.black_left_rook_moved = move_info["black_left_rook_moved"]
-    board_obj.black_right_rook_moved = move_info["black_right_rook_moved"]
+    # _set_square tiene allineati i bitboard; la chiave viene ripristinata in fondo
+    if move_info.partner != EMPTY:
+        # Arrocco: Re e Torre/Totem tornano alle caselle di partenza
+        _set_square(board_obj, move_info.tr, move_info.tc, EMPTY)
+        _set_square(board_obj, move_info.partner_tr, move_info.partner_tc, EMPTY)
+        _set_square(board_obj, move_info.partner_fr, move_info.partner_fc, move_info.partner)
+    else:
+        if move_info.push_r >= 0:
+            # Spinta del Bisonte: il pedone torna sulla casella d'arrivo
+            _set_square(board_obj, move_info.push_r, move_info.push_c, EMPTY)
+        _set_square(board_obj, move_info.tr, move_info.tc, move_info.captured)
+    _set_square(board_obj, move_info.fr, move_info.fc, move_info.mover)
 
-    board_obj.white_totem_inherited = move_info["white_totem_inherited"]
-    board_obj.black_totem_inherited = move_info["black_totem_inherited"]
+    board_obj.castling_rights = move_info.castling_rights
+    board_obj.white_totem_inherited = move_info.white_totem_inherited
+    board_obj.black_totem_inherited = move_info.black_totem_inherited
 
-    board_obj.turn_white = move_info["turn_white"]
-    board_obj.game_over = move_info["game_over"]
-    board_obj.winner = move_info["winner"]
+    board_obj.turn_white = not board_obj.turn_white
+    board_obj.zobrist_key = move_info.zobrist_key
+    board_obj.in_check = move_info.in_check
+    if board_obj.game_over:
+        # make_move_in_place parte sempre da una partita in corso
+        board_obj.game_over = False
+        board_obj.winner = None
 
-def _apply_normal_move(board_obj, fr, fc, tr, tc, promotion_piece):
-    mover = board_obj.board[fr][fc]
-    occupant = board_obj.board[tr][tc]
-
-    # Arrocco classico
-    if mover == WHITE_KING and board_obj.white_faction == "classici":
-        if (fr, fc) == (7,4) and (tr, tc) == (7,6):
-            return white_castle_short_inplace_classical(board_obj)
-        if (fr, fc) == (7,4) and (tr, tc) == (7,2):
-            return white_castle_long_inplace_classical(board_obj)
-
-    if mover == BLACK_KING and board_obj.black_faction == "classici":
-        if (fr, fc) == (0,4) and (tr, tc) == (0,6):
-            return black_castle_short_inplace_classical(board_obj)
-        if (fr, fc) == (0,4) and (tr, tc) == (0,2):
-            return black_castle_long_inplace_classical(board_obj)
-
-    # Arrocco nativi
-    if mover == WHITE_KING and board_obj.white_faction == "nativi":
-        if (fr, fc) == (7,4) and (tr, tc) == (7,6):
-            return white_castle_short_inplace_nativi(board_obj)
-        if (fr, fc) == (7,4) and (tr, tc) == (7,2):
-            return white_castle_long_inplace_nativi(board_obj)
-
-    if mover == BLACK_KING and board_obj.black_faction == "nativi":
-        if (fr, fc) == (0,4) and (tr, tc) == (0,6):
-            return black_castle_short_inplace_nativi(board_obj)
-        if (fr, fc) == (0,4) and (tr, tc) == (0,2):
-            return black_castle_long_inplace_nativi(board_obj)
-
-    # Aggiorna flag Re/Torri/Totem
-    if mover == WHITE_KING:
-        board_obj.white_king_moved = True
-    if mover == BLACK_KING:
-        board_obj.black_king_moved = True
-
-    if mover in (WHITE_ROOK, WHITE_TOTEM):
-        if (fr, fc) == (7, 0):
-            board_obj.white_left_rook_moved = True
-        elif (fr, fc) == (7, 7):
-            board_obj.white_right_rook_moved = True
-    if mover in (BLACK_ROOK, BLACK_TOTEM):
-        if (fr, fc) == (0, 0):
-            board_obj.black_left_rook_moved = True
-        elif (fr, fc) == (0, 7):
-            board_obj.black_right_rook_moved = True
-
-    # Promozione pedoni
-    if mover == WHITE_PAWN and tr == 0:
-        if occupant != EMPTY and is_white_piece(occupant):
-            return False
-        board_obj.board[tr][tc] = WHITE_QUEEN
-        board_obj.board[fr][fc] = EMPTY
-        _check_inherit_power(board_obj, mover, occupant)
-        return True
-    if mover == BLACK_PAWN and tr == 7:
-        if occupant != EMPTY and is_black_piece(occupant):
-            return False
-        board_obj.board[tr][tc] = BLACK_QUEEN
-        board_obj.board[fr][fc] = EMPTY
-        _check_inherit_power(board_obj, mover, occupant)
-        return True
+def make_null_move(board_obj):
+    board_obj.turn_white = not board_obj.turn_white
+    board_obj.zobrist_key ^= ZOBRIST_SIDE
+    board_obj.in_check = _is_king_attacked(board_obj, board_obj.turn_white)
 
-    # Bisonte
-    if mover in (WHITE_BISON, BLACK_BISON):
-        return _apply_bison_move(board_obj, fr, fc, tr, tc)
+def undo_null_move(board_obj):
+    board_obj.turn_white = not board_obj.turn_white
+    board_obj.zobrist_key ^= ZOBRIST_SIDE
+    board_obj.in_check = _is_king_attacked(board_obj, board_obj.turn_white)
 
-    # Cattura standard
-    if occupant != EMPTY:
-        if is_white_piece(mover) == is_white_piece(occupant):
-            return False
-        if occupant in (WHITE_BISON, BLACK_BISON) and mover in (WHITE_PAWN, BLACK_PAWN):
-            return False
+def gives_check(board_obj, move_info):
+    """
+    Chiamata da make_move_in_place a mossa eseguita (prima del cambio turno):
+    True se la mossa dà scacco al Re avversario. Si controllano solo i pezzi
+    che la mossa può aver cambiato: il pezzo arrivato (promozione compresa),
+    il partner dell'arrocco, i Totem che hanno appena ereditato un potere e
+    i pezzi che scorrono lungo le linee del Re liberate dalla mossa (scacco
+    di scoperta, anche quando a muovere è un Bisonte che spinge un pedone).
+    La posizione di partenza non deve avere il Re avversario già sotto scacco.
+    """
+    white = is_white_piece(move_info.mover)
+    king_sq = board_obj.black_king_sq if white else board_obj.white_king_sq
+    if king_sq is None:
+        return False
+    king_bit = 1 << king_sq
+    occ = board_obj.white_bb | board_obj.black_bb
 
-    board_obj.board[tr][tc] = mover
-    board_obj.board[fr][fc] = EMPTY
+    # Scacco diretto
+    to = move_info.tr * BOARD_SIZE + move_info.tc
+    if piece_attacks_bb(board_obj, to, move_info.placed, occ) & king_bit:
+        return True
+    vacated = 1 << (move_info.fr * BOARD_SIZE + move_info.fc)
+    if move_info.partner != EMPTY:
+        partner_to = move_info.partner_tr * BOARD_SIZE + move_info.partner_tc
+        if piece_attacks_bb(board_obj, partner_to, move_info.partner, occ) & king_bit:
+            return True
+        vacated |= 1 << (move_info.partner_fr * BOARD_SIZE + move_info.partner_fc)
+
+    # Totem con un nuovo potere ereditato
+    if white:
+        new_power = board_obj.white_totem_inherited != move_info.white_totem_inherited
+        totem = WHITE_TOTEM
+    else:
+        new_power = board_obj.black_totem_inherited != move_info.black_totem_inherited
+        totem = BLACK_TOTEM
+    if new_power:
+        totems = board_obj.piece_bb[totem]
+        while totems:
+            low = totems & -totems
+            totems ^= low
+            if piece_attacks_bb(board_obj, low.bit_length() - 1, totem, occ) & king_bit:
+                return True
+
+    # Scacco di scoperta
+    orthogonal_lines = rook_attacks_bb(king_sq, 0)
+    diagonal_lines = bishop_attacks_bb(king_sq, 0)
+    if vacated & (orthogonal_lines | diagonal_lines):
+        orthogonal, diagonal = slider_attackers_bb(board_obj, white)
+        if vacated & orthogonal_lines and rook_attacks_bb(king_sq, occ) & orthogonal:
+            return True
+        if vacated & diagonal_lines and bishop_attacks_bb(king_sq, occ) & diagonal:
+            return True
+    return False
 
-    _check_inherit_power(board_obj, mover, occupant)
-    return True
+def _apply_normal_move(board_obj, move_info):
+    fr, fc, tr, tc = move_info.fr, move_info.fc, move_info.tr, move_info.tc
+    mover = move_info.mover
+    occupant = move_info.captured
+    mover_is_white = is_white_piece(mover)
 
-def _apply_bison_move(board_obj, fr, fc, tr, tc):
-    bison = board_obj.board[fr][fc]
-    board_obj.board[fr][fc] = EMPTY
-    occupant = board_obj.board[tr][tc]
+    # Arrocco (classici / nativi)
+    if mover == WHITE_KING or mover == BLACK_KING:
+        castle = _CASTLE_BY_KING_MOVE.get((mover, tr * BOARD_SIZE + tc))
+        if castle is not None and castle[2] == fr * BOARD_SIZE + fc:
+            return _apply_castle(board_obj, move_info, castle)
 
-    if occupant == EMPTY:
-        board_obj.board[tr][tc] = bison
-    else:
-        if is_white_piece(bison) == is_white_piece(occupant):
-            board_obj.board[fr][fc] = bison
-            return False
+    # Validazione: nessuna modifica finché la mossa non è accettata
+    if occupant != EMPTY and is_white_piece(occupant) == mover_is_white:
+        return False
+
+    promotes = (mover == WHITE_PAWN and tr == 0) or (mover == BLACK_PAWN and tr == 7)
+    if mover in (WHITE_BISON, BLACK_BISON):
         if occupant in (WHITE_PAWN, BLACK_PAWN):
+            # Il Bisonte spinge il pedone avversario di una casella
             dr = tr - fr
             dc = tc - fc
             if dr != 0:
@@ -588,16 +1160,58 @@ def _apply_bison_move(board_obj, fr, fc, tr, tc):
                 dc //= abs(dc)
             push_r = tr + dr
             push_c = tc + dc
-            if in_bounds(push_r, push_c) and board_obj.board[push_r][push_c] == EMPTY:
-                board_obj.board[push_r][push_c] = occupant
-                board_obj.board[tr][tc] = bison
-            else:
-                board_obj.board[fr][fc] = bison
+            if not (in_bounds(push_r, push_c) and board_obj.board[push_r][push_c] == EMPTY):
                 return False
+            move_info.push_r = push_r
+            move_info.push_c = push_c
+    elif not promotes:
+        if occupant in (WHITE_BISON, BLACK_BISON) and mover in (WHITE_PAWN, BLACK_PAWN):
+            return False
+
+    # Diritti di arrocco persi muovendo il Re o una Torre/Totem d'angolo
+    if board_obj.castling_rights:
+        if mover == WHITE_KING:
+            board_obj.castling_rights &= ~WHITE_CASTLING
+        elif mover == BLACK_KING:
+            board_obj.castling_rights &= ~BLACK_CASTLING
         else:
-            board_obj.board[tr][tc] = bison
+            lost = _CASTLING_RIGHTS_LOST.get((mover, fr * BOARD_SIZE + fc))
+            if lost:
+                board_obj.castling_rights &= ~lost
 
-    _check_inherit_power(board_obj, bison, occupant)
+    # Promozione pedoni (sempre a Regina)
+    if promotes:
+        move_info.placed = WHITE_QUEEN if mover_is_white else BLACK_QUEEN
+
+    if move_info.push_r >= 0:
+        _set_square(board_obj, move_info.push_r, move_info.push_c, occupant)
+    _set_square(board_obj, fr, fc, EMPTY)
+    _set_square(board_obj, tr, tc, move_info.placed)
+
+    _check_inherit_power(board_obj, mover, occupant)
+    return True
+
+def _apply_castle(board_obj, move_info, castle):
+    (right, white, king_from, king_to, partner_from, partner_to, empty_bb, _transit) = castle
+    faction = board_obj.white_faction if white else board_obj.black_faction
+    partner = CASTLING_PARTNER[(white, faction)]
+    pfr, pfc = divmod(partner_from, BOARD_SIZE)
+    ptr, ptc = divmod(partner_to, BOARD_SIZE)
+    # Le caselle attraversate sono già state verificate da _castling_moves
+    if not (board_obj.castling_rights & right) \
+       or (board_obj.white_bb | board_obj.black_bb) & empty_bb \
+       or board_obj.board[pfr][pfc] != partner:
+        return False
+    move_info.partner = partner
+    move_info.partner_fr = pfr
+    move_info.partner_fc = pfc
+    move_info.partner_tr = ptr
+    move_info.partner_tc = ptc
+    _set_square(board_obj, pfr, pfc, EMPTY)
+    _set_square(board_obj, move_info.fr, move_info.fc, EMPTY)
+    _set_square(board_obj, move_info.tr, move_info.tc, move_info.mover)
+    _set_square(board_obj, ptr, ptc, partner)
+    board_obj.castling_rights &= ~(WHITE_CASTLING if white else BLACK_CASTLING)
     return True
 
 def does_move_leave_king_in_check(board_obj, fr, fc, tr, tc):
@@ -608,20 +1222,25 @@ def does_move_leave_king_in_check(board_obj, fr, fc, tr, tc):
     if not can_move_piece(board_obj, mover):
         return True
 
-    move_info = make_move_in_place(board_obj, fr, fc, tr, tc)
-    if not move_info["move_done"]:
+    move_info = make_move_in_place(board_obj, fr, fc, tr, tc, update_check=False)
+    if not move_info.move_done:
         return True
 
     mover_is_white = is_white_piece(mover)
-    in_check_now = is_in_check(board_obj, mover_is_white)
+    in_check_now = _is_king_attacked(board_obj, mover_is_white)
     undo_move_in_place(board_obj, move_info)
     return in_check_now
 
 def check_end_of_game(board_obj):
     if board_obj.game_over:
         return
-    moves = get_all_legal_moves(board_obj, board_obj.turn_white)
-    if not moves:
+    # Basta sapere se esiste una mossa: la lista si usa solo se è già in cache
+    entry = board_obj.legal_move_cache.get(board_obj.zobrist_key)
+    if entry is not None:
+        any_move = bool(entry.moves)
+    else:
+        any_move = has_any_legal_move(board_obj, board_obj.turn_white)
+    if not any_move:
         if is_in_check(board_obj, board_obj.turn_white):
             board_obj.game_over = True
             board_obj.winner = "Black" if board_obj.turn_white else "White"
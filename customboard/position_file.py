@@ -0,0 +1,137 @@
+# position_file.py
+
+from piece_movement.piece_movement_common import BOARD_SIZE, EMPTY, BLACK_KING
+from .board import CustomBoard
+from .zobrist import (
+    WHITE_CASTLE_SHORT, WHITE_CASTLE_LONG, BLACK_CASTLE_SHORT, BLACK_CASTLE_LONG,
+    TOTEM_POWERS
+)
+
+def _parse_bool(line_str, prefix):
+    if not line_str.startswith(prefix):
+        raise ValueError(f"Formato file non corretto ({prefix}).")
+    val = line_str.split(":", 1)[1].strip()
+    return (val == "True")
+
+def _castling_rights_from_flags(moved):
+    """
+    Maschera dei diritti di arrocco a partire dai sei flag del file salvato.
+    """
+    rights = 0
+    if not moved["WHITE_KING_MOVED"]:
+        if not moved["WHITE_RIGHT_ROOK_MOVED"]:
+            rights |= WHITE_CASTLE_SHORT
+        if not moved["WHITE_LEFT_ROOK_MOVED"]:
+            rights |= WHITE_CASTLE_LONG
+    if not moved["BLACK_KING_MOVED"]:
+        if not moved["BLACK_RIGHT_ROOK_MOVED"]:
+            rights |= BLACK_CASTLE_SHORT
+        if not moved["BLACK_LEFT_ROOK_MOVED"]:
+            rights |= BLACK_CASTLE_LONG
+    return rights
+
+def _parse_totem_inherited(line_str, prefix):
+    """
+    Potere ereditato dal Totem ("NONE" = nessuno); solleva ValueError se il
+    valore non è uno dei poteri ammessi.
+    """
+    val = line_str.split(":", 1)[1].strip()
+    if val == "NONE":
+        return None
+    if val not in TOTEM_POWERS:
+        raise ValueError(f"Formato file non corretto ({prefix}).")
+    return val
+
+def parse_position_lines(lines, white_faction="nativi", black_faction="classici"):
+    """
+    Costruisce un CustomBoard dalle righe di un file salvato con "Save Position"
+    (formato di vittorianativi1.txt). Il file non salva le fazioni: si usano
+    quelle indicate (di default le stesse di CustomBoard()).
+    Solleva ValueError con lo stesso messaggio mostrato dalla GUI se il file
+    non è valido.
+    """
+    if len(lines) < 8:
+        raise ValueError("File non valido o troppo corto.")
+
+    new_board = CustomBoard(white_faction=white_faction, black_faction=black_faction)
+    new_board.move_history.clear()
+
+    for r in range(BOARD_SIZE):
+        row_line = lines[r].strip()
+        piece_names = row_line.split(",")
+        if len(piece_names) != 8:
+            raise ValueError(f"Riga {r+1} non valida (8 pezzi).")
+        for c in range(BOARD_SIZE):
+            try:
+                piece = int(piece_names[c])
+            except ValueError:
+                raise ValueError(f"Riga {r+1} non valida (pezzo '{piece_names[c].strip()}').")
+            if not EMPTY <= piece <= BLACK_KING:
+                raise ValueError(f"Riga {r+1} non valida (pezzo {piece}).")
+            new_board.board[r][c] = piece
+
+    idx = 8
+    if idx >= len(lines) or not lines[idx].startswith("GAME_OVER:"):
+        raise ValueError("Formato file non corretto (GAME_OVER).")
+    idx += 1
+    val_go = lines[idx].strip() if idx < len(lines) else ""
+    new_board.game_over = (val_go == "True")
+    idx += 1
+
+    if idx >= len(lines) or not lines[idx].startswith("WINNER:"):
+        raise ValueError("Formato file non corretto (WINNER).")
+    winner_val = lines[idx].split(":", 1)[1].strip()
+    if winner_val == "None":
+        new_board.winner = None
+    else:
+        new_board.winner = winner_val
+    idx += 1
+
+    if idx >= len(lines) or not lines[idx].startswith("Turn:"):
+        raise ValueError("Formato file non corretto (Turn).")
+    turn_str = lines[idx].split(":", 1)[1].strip()
+    new_board.turn_white = (turn_str == "W")
+    idx += 1
+
+    # Flag di arrocco, nell'ordine in cui vengono salvati
+    moved = {}
+    for prefix in (
+        "WHITE_KING_MOVED",
+        "WHITE_LEFT_ROOK_MOVED",
+        "WHITE_RIGHT_ROOK_MOVED",
+        "BLACK_KING_MOVED",
+        "BLACK_LEFT_ROOK_MOVED",
+        "BLACK_RIGHT_ROOK_MOVED",
+    ):
+        moved[prefix] = False
+        if idx < len(lines):
+            moved[prefix] = _parse_bool(lines[idx], prefix)
+            idx += 1
+    new_board.castling_rights = _castling_rights_from_flags(moved)
+
+    if idx < len(lines) and lines[idx].startswith("WHITE_TOTEM_INHERITED:"):
+        new_board.white_totem_inherited = _parse_totem_inherited(lines[idx], "WHITE_TOTEM_INHERITED")
+        idx += 1
+
+    if idx < len(lines) and lines[idx].startswith("BLACK_TOTEM_INHERITED:"):
+        new_board.black_totem_inherited = _parse_totem_inherited(lines[idx], "BLACK_TOTEM_INHERITED")
+        idx += 1
+
+    if idx < len(lines) and lines[idx].strip() == "MOVE_HISTORY:":
+        idx += 1
+        while idx < len(lines):
+            mh_line = lines[idx].strip()
+            if mh_line:
+                new_board.move_history.append(mh_line)
+            idx += 1
+
+    new_board.refresh_state()
+    return new_board
+
+def load_position_file(filename, white_faction="nativi", black_faction="classici"):
+    """
+    Legge un file di posizione e ritorna il CustomBoard corrispondente.
+    """
+    with open(filename, "r") as f:
+        lines = [line.rstrip("\n") for line in f]
+    return parse_position_lines(lines, white_faction, black_faction)
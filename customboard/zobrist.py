@@ -0,0 +1,63 @@
+# zobrist.py
+
+import random
+
+from piece_movement.piece_movement_common import BOARD_SIZE, EMPTY
+
+# Seme fisso: le chiavi devono essere identiche tra un'esecuzione e l'altra,
+# così la transposition table e la cache del rumore restano riproducibili.
+_ZOBRIST_SEED = 0x5EED_C4E5
+
+_rng = random.Random(_ZOBRIST_SEED)
+
+def _rand64():
+    return _rng.getrandbits(64)
+
+# ZOBRIST_PIECE[pezzo][casella], con casella = r * 8 + c (EMPTY vale sempre 0)
+ZOBRIST_PIECE = [[0] * (BOARD_SIZE * BOARD_SIZE)]
+for _p in range(1, 19):
+    ZOBRIST_PIECE.append([_rand64() for _ in range(BOARD_SIZE * BOARD_SIZE)])
+
+# Applicata quando tocca al Nero
+ZOBRIST_SIDE = _rand64()
+
+# Diritti di arrocco: maschera a 4 bit (corto/lungo per ciascun colore)
+WHITE_CASTLE_SHORT = 1
+WHITE_CASTLE_LONG = 2
+BLACK_CASTLE_SHORT = 4
+BLACK_CASTLE_LONG = 8
+WHITE_CASTLING = WHITE_CASTLE_SHORT | WHITE_CASTLE_LONG
+BLACK_CASTLING = BLACK_CASTLE_SHORT | BLACK_CASTLE_LONG
+ALL_CASTLING = WHITE_CASTLING | BLACK_CASTLING
+
+# Una chiave per ciascun valore della maschera (nessun diritto = chiave nulla)
+ZOBRIST_CASTLING = [0] + [_rand64() for _ in range(ALL_CASTLING)]
+
+# Potere ereditato dai Totem (None = nessun potere, chiave nulla)
+TOTEM_POWERS = ("ROOK", "BISHOP", "KNIGHT", "KING", "SHAMAN", "BISON", "TOTEM")
+ZOBRIST_WHITE_INHERITED = {power: _rand64() for power in TOTEM_POWERS}
+ZOBRIST_BLACK_INHERITED = {power: _rand64() for power in TOTEM_POWERS}
+ZOBRIST_WHITE_INHERITED[None] = 0
+ZOBRIST_BLACK_INHERITED[None] = 0
+
+
+def compute_zobrist(board_obj):
+    """
+    Calcola da zero la chiave Zobrist a 64 bit della posizione:
+    pezzi, turno, diritti di arrocco e poteri ereditati dei Totem.
+    Usata all'inizializzazione e dopo modifiche dirette alla scacchiera;
+    durante la ricerca la chiave viene aggiornata in modo incrementale.
+    """
+    key = 0
+    for r in range(BOARD_SIZE):
+        row = board_obj.board[r]
+        for c in range(BOARD_SIZE):
+            p = row[c]
+            if p != EMPTY:
+                key ^= ZOBRIST_PIECE[p][r * BOARD_SIZE + c]
+    if not board_obj.turn_white:
+        key ^= ZOBRIST_SIDE
+    key ^= ZOBRIST_CASTLING[board_obj.castling_rights]
+    key ^= ZOBRIST_WHITE_INHERITED[board_obj.white_totem_inherited]
+    key ^= ZOBRIST_BLACK_INHERITED[board_obj.black_totem_inherited]
+    return key
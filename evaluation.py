@@ -4,16 +4,15 @@ import random
 from piece_movement.piece_movement_common import (
     EMPTY,
     WHITE_PAWN, BLACK_PAWN,
-    WHITE_KNIGHT, BLACK_KNIGHT,
+    WHITE_KNIGHT,
     WHITE_BISHOP, BLACK_BISHOP,
     WHITE_SHAMAN, BLACK_SHAMAN,
-    WHITE_BISON, BLACK_BISON,
     WHITE_ROOK, BLACK_ROOK,
-    WHITE_TOTEM, BLACK_TOTEM,
-    WHITE_QUEEN, BLACK_QUEEN,
     WHITE_KING, BLACK_KING,
+    PIECE_VALUE,
     is_white_piece, is_black_piece
 )
+from piece_movement.bitboards import FILE_BB, popcount
 
 ###############################################################################
 # 1) Definizione cache di rumore e funzioni correlate
@@ -41,8 +40,8 @@ def get_position_noise(board_obj, amplitude=0.0):
     if pos_key in NOISE_CACHE:
         return NOISE_CACHE[pos_key]
 
-    # Creiamo un seme unendo il seme di partita con la stringa pos_key
-    big_seed = str(getattr(board_obj, "game_noise_seed", 0)) + pos_key
+    # Creiamo un seme unendo il seme di partita con la chiave pos_key
+    big_seed = str(getattr(board_obj, "game_noise_seed", 0)) + str(pos_key)
     numeric_seed = abs(hash(big_seed)) % 1000000000
     rstate = random.Random(numeric_seed)
 
@@ -52,34 +51,16 @@ def get_position_noise(board_obj, amplitude=0.0):
 
 def board_position_hash(board_obj):
     """
-    Restituisce una stringa univoca che codifica la scacchiera e il turno.
+    Restituisce la chiave Zobrist (int a 64 bit) che codifica la scacchiera,
+    il turno, i flag di arrocco e i poteri ereditati dei Totem.
     """
-    rows = []
-    for r in range(8):
-        row_pieces = []
-        for c in range(8):
-            row_pieces.append(str(board_obj.board[r][c]))
-        rows.append(",".join(row_pieces))
-    turn_char = "W" if board_obj.turn_white else "B"
-    return f"{'/'.join(rows)} {turn_char}"
+    return board_obj.zobrist_key
 
 
 ################################################################################
-# Valori base per il materiale (base) + PST
+# Valori base per il materiale (PIECE_VALUE, in piece_movement_common) + PST
 ################################################################################
 
-PIECE_VALUE = {
-    WHITE_PAWN: 1,   BLACK_PAWN: 1,
-    WHITE_KNIGHT: 3, BLACK_KNIGHT: 3,
-    WHITE_BISHOP: 3, BLACK_BISHOP: 3,
-    WHITE_SHAMAN: 3, BLACK_SHAMAN: 3,
-    WHITE_BISON: 4,  BLACK_BISON: 4,
-    WHITE_ROOK: 5,   BLACK_ROOK: 5,
-    WHITE_TOTEM: 4,  BLACK_TOTEM: 4,
-    WHITE_QUEEN: 9,  BLACK_QUEEN: 9,
-    WHITE_KING: 999, BLACK_KING: 999
-}
-
 # Esempio di PST per alcuni pezzi
 PST_WHITE_PAWN = [
     [ 0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
@@ -183,37 +164,15 @@ def advanced_king_safety(board_obj, white=True):
         return 0.0
 
     penalty = 1.0
-    all_legal = board_obj.get_all_legal_moves(white)
-
-    king_piece = WHITE_KING if white else BLACK_KING
-    king_pos = None
-    for r in range(8):
-        for c in range(8):
-            if board_obj.board[r][c] == king_piece:
-                king_pos = (r, c)
-                break
-        if king_pos is not None:
-            break
-
-    if king_pos is None:
+    king_sq = board_obj.white_king_sq if white else board_obj.black_king_sq
+    if king_sq is None:
         return 10.0
 
-    (kr, kc) = king_pos
-    can_resolve_without_king = False
-    for (fr, fc, tr, tc) in all_legal:
-        if (fr, fc) != (kr, kc):
-            can_resolve_without_king = True
-            break
-
-    if can_resolve_without_king:
+    # Basta contare le evasioni: nessuna lista di mosse
+    n_king_moves, n_other_moves = board_obj.count_evasions(white)
+    if n_other_moves:
         return penalty  # 1.0
 
-    king_moves = []
-    for (fr, fc, tr, tc) in all_legal:
-        if (fr, fc) == (kr, kc):
-            king_moves.append((tr, tc))
-
-    n_king_moves = len(king_moves)
     if n_king_moves == 2:
         penalty += 1
     elif n_king_moves == 1:
@@ -225,17 +184,12 @@ def advanced_king_safety(board_obj, white=True):
 
 
 ################################################################################
-# static_evaluation
+# Materiale + PST, coppia degli alfieri, torri su colonna aperta
 ################################################################################
 
-def static_evaluation(board_obj, noise_amplitude=0.8):
+def _material_terms(board_obj):
     """
-    Restituisce un punteggio (positivo = vantaggio bianco, negativo = vantaggio nero).
-      - Material + PST
-      - Bishop pair
-      - Rook su colonna aperta
-      - King safety
-      - Rumore deterministico (dipende da questa posizione)
+    Ritorna (white_mat, black_mat) scorrendo le liste dei pezzi dei due colori.
     """
     white_mat = 0.0
     black_mat = 0.0
@@ -245,31 +199,28 @@ def static_evaluation(board_obj, noise_amplitude=0.8):
     black_rooks_positions = []
     any_pawns_in_col = [0]*8
 
-    for r in range(8):
-        for c in range(8):
-            p = board_obj.board[r][c]
-            if p == EMPTY:
-                continue
-
-            base_val = PIECE_VALUE.get(p, 0)
-            pst_val = get_pst_value(p, r, c)
-
-            if is_white_piece(p):
-                white_mat += (base_val + pst_val)
-                if p in (WHITE_BISHOP, WHITE_SHAMAN):
-                    white_bishops += 1
-                if p == WHITE_ROOK:
-                    white_rooks_positions.append((r, c))
-                if p == WHITE_PAWN:
-                    any_pawns_in_col[c] += 1
-            else:
-                black_mat += (base_val + pst_val)
-                if p in (BLACK_BISHOP, BLACK_SHAMAN):
-                    black_bishops += 1
-                if p == BLACK_ROOK:
-                    black_rooks_positions.append((r, c))
-                if p == BLACK_PAWN:
-                    any_pawns_in_col[c] += 1
+    bstate = board_obj.board
+    for sq in sorted(board_obj.white_squares):
+        r, c = divmod(sq, 8)
+        p = bstate[r][c]
+        white_mat += (PIECE_VALUE.get(p, 0) + get_pst_value(p, r, c))
+        if p in (WHITE_BISHOP, WHITE_SHAMAN):
+            white_bishops += 1
+        if p == WHITE_ROOK:
+            white_rooks_positions.append((r, c))
+        if p == WHITE_PAWN:
+            any_pawns_in_col[c] += 1
+
+    for sq in sorted(board_obj.black_squares):
+        r, c = divmod(sq, 8)
+        p = bstate[r][c]
+        black_mat += (PIECE_VALUE.get(p, 0) + get_pst_value(p, r, c))
+        if p in (BLACK_BISHOP, BLACK_SHAMAN):
+            black_bishops += 1
+        if p == BLACK_ROOK:
+            black_rooks_positions.append((r, c))
+        if p == BLACK_PAWN:
+            any_pawns_in_col[c] += 1
 
     # bishop pair
     if white_bishops >= 2:
@@ -285,6 +236,73 @@ def static_evaluation(board_obj, noise_amplitude=0.8):
         if any_pawns_in_col[cc] == 0:
             black_mat += 0.25
 
+    return white_mat, black_mat
+
+def _material_terms_bb(board_obj):
+    """
+    Come _material_terms, ma scorre solo le caselle occupate; coppia degli
+    alfieri e colonne aperte si ricavano con popcount e maschere di colonna.
+    """
+    bstate = board_obj.board
+    piece_bb = board_obj.piece_bb
+    white_mat = 0.0
+    black_mat = 0.0
+
+    occupied = board_obj.white_bb | board_obj.black_bb
+    while occupied:
+        low = occupied & -occupied
+        occupied ^= low
+        sq = low.bit_length() - 1
+        r = sq >> 3
+        c = sq & 7
+        p = bstate[r][c]
+        if p & 1:
+            white_mat += (PIECE_VALUE.get(p, 0) + get_pst_value(p, r, c))
+        else:
+            black_mat += (PIECE_VALUE.get(p, 0) + get_pst_value(p, r, c))
+
+    # bishop pair
+    if popcount(piece_bb[WHITE_BISHOP] | piece_bb[WHITE_SHAMAN]) >= 2:
+        white_mat += 0.3
+    if popcount(piece_bb[BLACK_BISHOP] | piece_bb[BLACK_SHAMAN]) >= 2:
+        black_mat += 0.3
+
+    # rook on open file
+    pawns = piece_bb[WHITE_PAWN] | piece_bb[BLACK_PAWN]
+    rooks = piece_bb[WHITE_ROOK]
+    while rooks:
+        low = rooks & -rooks
+        rooks ^= low
+        if not (FILE_BB[(low.bit_length() - 1) & 7] & pawns):
+            white_mat += 0.25
+    rooks = piece_bb[BLACK_ROOK]
+    while rooks:
+        low = rooks & -rooks
+        rooks ^= low
+        if not (FILE_BB[(low.bit_length() - 1) & 7] & pawns):
+            black_mat += 0.25
+
+    return white_mat, black_mat
+
+
+################################################################################
+# static_evaluation
+################################################################################
+
+def static_evaluation(board_obj, noise_amplitude=0.8):
+    """
+    Restituisce un punteggio (positivo = vantaggio bianco, negativo = vantaggio nero).
+      - Material + PST
+      - Bishop pair
+      - Rook su colonna aperta
+      - King safety
+      - Rumore deterministico (dipende da questa posizione)
+    """
+    if board_obj.use_bitboards:
+        white_mat, black_mat = _material_terms_bb(board_obj)
+    else:
+        white_mat, black_mat = _material_terms(board_obj)
+
     # king safety
     white_mat -= advanced_king_safety(board_obj, white=True)
     black_mat -= advanced_king_safety(board_obj, white=False)
@@ -0,0 +1,194 @@
+# perft.py
+#
+# Conteggio dei nodi del generatore di mosse (perft), con "divide" per mossa
+# radice e nodi al secondo. Serve a verificare e cronometrare ogni modifica a
+# customboard/moves.py e piece_movement/.
+#
+# Esempi:
+#   python perft.py --white nativi --black classici --depth 3
+#   python perft.py --file vittorianativi1.txt --depth 2 --divide
+#   python perft.py --depth 3 --mailbox      (backend a matrice, per confronto)
+#   python perft.py --depth 6 --processes 0 --hash   (tutti i core, con memo)
+
+import argparse
+import multiprocessing
+import pickle
+import time
+
+from customboard import CustomBoard
+from customboard.move_encoding import decode_move
+from customboard.position_file import load_position_file
+
+FACTIONS = ("classici", "nativi")
+
+# Limite di voci della tabella (chiave, profondità) -> foglie, per processo.
+# Quando viene superato la tabella si svuota e ricomincia a riempirsi.
+PERFT_HASH_MAX_ENTRIES = 4000000
+
+def perft(board_obj, depth):
+    """
+    Numero di foglie dell'albero delle mosse legali a profondità 'depth'.
+    All'ultimo livello si contano le mosse senza eseguirle né elencarle.
+    """
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return board_obj.count_legal_moves(board_obj.turn_white)
+    nodes = 0
+    for mv in board_obj.get_all_legal_moves_encoded(board_obj.turn_white):
+        move_info = board_obj.make_encoded_move(mv)
+        if not move_info.move_done:
+            continue
+        nodes += perft(board_obj, depth - 1)
+        board_obj.undo_move_in_place(move_info)
+    return nodes
+
+def perft_hashed(board_obj, depth, table):
+    """
+    Come perft, ma memorizza le foglie dei sottoalberi in 'table', con chiave
+    (chiave Zobrist, profondità rimanente): le trasposizioni si contano una volta.
+    """
+    if depth <= 0:
+        return 1
+    key = (board_obj.zobrist_key, depth)
+    nodes = table.get(key)
+    if nodes is not None:
+        return nodes
+    if depth == 1:
+        nodes = board_obj.count_legal_moves(board_obj.turn_white)
+    else:
+        nodes = 0
+        for mv in board_obj.get_all_legal_moves_encoded(board_obj.turn_white):
+            move_info = board_obj.make_encoded_move(mv)
+            if not move_info.move_done:
+                continue
+            nodes += perft_hashed(board_obj, depth - 1, table)
+            board_obj.undo_move_in_place(move_info)
+    if len(table) >= PERFT_HASH_MAX_ENTRIES:
+        table.clear()
+    table[key] = nodes
+    return nodes
+
+def perft_divide(board_obj, depth):
+    """
+    Ritorna una lista di (mossa codificata, foglie) per ogni mossa legale alla radice.
+    """
+    out = []
+    for mv in board_obj.get_all_legal_moves_encoded(board_obj.turn_white):
+        move_info = board_obj.make_encoded_move(mv)
+        if not move_info.move_done:
+            continue
+        out.append((mv, perft(board_obj, depth - 1)))
+        board_obj.undo_move_in_place(move_info)
+    return out
+
+# -------------------------------------------------------
+# Perft parallelo: le mosse radice si dividono tra i processi
+# -------------------------------------------------------
+_WORKER_TABLE = {}
+
+def _board_to_bytes(board_obj):
+    # Il riferimento alla GUI (parent) non va serializzato
+    parent = board_obj.parent
+    board_obj.parent = None
+    try:
+        return pickle.dumps(board_obj)
+    finally:
+        board_obj.parent = parent
+
+def _perft_worker(task):
+    board_bytes, move, depth, use_hash = task
+    board_obj = pickle.loads(board_bytes)
+    move_info = board_obj.make_encoded_move(move)
+    if not move_info.move_done:
+        return (move, 0)
+    if use_hash:
+        # La tabella resta viva nel processo tra una mossa radice e l'altra
+        return (move, perft_hashed(board_obj, depth - 1, _WORKER_TABLE))
+    return (move, perft(board_obj, depth - 1))
+
+def parallel_perft_divide(board_obj, depth, processes=None, use_hash=True):
+    """
+    Divide calcolato con un pool di processi: ogni mossa radice è un task.
+    Il risultato è nello stesso ordine di get_all_legal_moves_encoded, quindi non
+    dipende da come i task vengono distribuiti.
+    """
+    if depth < 1:
+        return []
+    board_bytes = _board_to_bytes(board_obj)
+    tasks = [(board_bytes, mv, depth, use_hash)
+             for mv in board_obj.get_all_legal_moves_encoded(board_obj.turn_white)]
+    if not tasks:
+        return []
+    with multiprocessing.Pool(processes=processes) as pool:
+        return pool.map(_perft_worker, tasks, chunksize=1)
+
+def format_move(board_obj, move):
+    """
+    Stesso formato di move_history: "pezzo@(fr,fc)->(tr,tc)".
+    """
+    (fr, fc, tr, tc) = decode_move(move)
+    return f"{board_obj.board[fr][fc]}@({fr},{fc})->({tr},{tc})"
+
+def run_perft(board_obj, depth, divide=False, processes=None, use_hash=False, out=print):
+    """
+    Esegue perft (o divide) e stampa foglie, tempo e nodi al secondo.
+    Con processes != None le mosse radice vengono divise su un pool di processi
+    (0 = tutti i core); con use_hash i sottoalberi vengono memorizzati.
+    Ritorna il numero totale di foglie.
+    """
+    start = time.perf_counter()
+    if processes is not None and depth >= 1:
+        results = parallel_perft_divide(board_obj, depth, processes or None, use_hash)
+        total = 0
+        for (mv, count) in results:
+            if divide:
+                out(f"{format_move(board_obj, mv)}: {count}")
+            total += count
+        if divide:
+            out(f"Mosse radice: {len(results)}")
+    elif use_hash:
+        total = perft_hashed(board_obj, depth, {})
+    elif divide and depth >= 1:
+        results = perft_divide(board_obj, depth)
+        total = 0
+        for (mv, count) in results:
+            out(f"{format_move(board_obj, mv)}: {count}")
+            total += count
+        out(f"Mosse radice: {len(results)}")
+    else:
+        total = perft(board_obj, depth)
+    elapsed = time.perf_counter() - start
+    nps = total / elapsed if elapsed > 0 else 0.0
+    out(f"Perft({depth}) = {total}  tempo {elapsed:.3f}s  nps {nps:,.0f}")
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft per CustomBoard")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--white", choices=FACTIONS, default="nativi")
+    parser.add_argument("--black", choices=FACTIONS, default="classici")
+    parser.add_argument("--file", help="posizione salvata (formato vittorianativi1.txt)")
+    parser.add_argument("--divide", action="store_true", help="foglie per ogni mossa radice")
+    parser.add_argument("--mailbox", action="store_true", help="usa la matrice invece dei bitboard")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="divide le mosse radice su N processi (0 = tutti i core)")
+    parser.add_argument("--hash", action="store_true",
+                        help="memorizza i sottoalberi per (chiave, profondità)")
+    args = parser.parse_args()
+
+    if args.file:
+        board_obj = load_position_file(args.file, args.white, args.black)
+        board_obj.use_bitboards = not args.mailbox
+    else:
+        board_obj = CustomBoard(white_faction=args.white, black_faction=args.black,
+                                use_bitboards=not args.mailbox)
+
+    print(f"Bianco: {board_obj.white_faction}, Nero: {board_obj.black_faction}, "
+          f"turno: {'W' if board_obj.turn_white else 'B'}, "
+          f"backend: {'matrice' if args.mailbox else 'bitboard'}")
+    run_perft(board_obj, args.depth, divide=args.divide,
+              processes=args.processes, use_hash=args.hash)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# attack_tables.py
+
+from .piece_movement_common import BOARD_SIZE, in_bounds
+
+# --------------------------------------------------------------------------
+# Tabelle precalcolate all'import per i pezzi "a salto" (leaper).
+# Indice = casella sq = r * 8 + c.
+#   *_TARGETS[sq]  -> tupla di caselle (r, c), per i generatori a matrice
+#   *_BB[sq]       -> stessa geometria come maschera a 64 bit, per i bitboard
+# L'ordine delle tuple è quello dei vecchi cicli sugli offset.
+# --------------------------------------------------------------------------
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (2, -1), (2, 1), (1, -2), (1, 2), (-1, -2), (-1, 2))
+KING_OFFSETS = tuple((dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if (dr, dc) != (0, 0))
+DIAGONAL_DIRS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+ORTHOGONAL_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+def _offset_targets(r, c, offsets):
+    return tuple((r + dr, c + dc) for (dr, dc) in offsets if in_bounds(r + dr, c + dc))
+
+def _shaman_targets(r, c):
+    # Per ogni diagonale: primo passo, poi salto al secondo (anche se il primo è occupato)
+    out = []
+    for (dr, dc) in DIAGONAL_DIRS:
+        if in_bounds(r + dr, c + dc):
+            out.append((r + dr, c + dc))
+            if in_bounds(r + 2 * dr, c + 2 * dc):
+                out.append((r + 2 * dr, c + 2 * dc))
+    return tuple(out)
+
+def _mask(targets):
+    bb = 0
+    for (r, c) in targets:
+        bb |= 1 << (r * BOARD_SIZE + c)
+    return bb
+
+_SQUARES = [(sq // BOARD_SIZE, sq % BOARD_SIZE) for sq in range(BOARD_SIZE * BOARD_SIZE)]
+
+KNIGHT_TARGETS = tuple(_offset_targets(r, c, KNIGHT_OFFSETS) for (r, c) in _SQUARES)
+KING_TARGETS = tuple(_offset_targets(r, c, KING_OFFSETS) for (r, c) in _SQUARES)
+SHAMAN_TARGETS = tuple(_shaman_targets(r, c) for (r, c) in _SQUARES)
+ORTHOGONAL_NEIGHBORS = tuple(_offset_targets(r, c, ORTHOGONAL_DIRS) for (r, c) in _SQUARES)
+
+# Attacchi del pedone: il Bianco sale (riga - 1), il Nero scende (riga + 1)
+WHITE_PAWN_ATTACK_TARGETS = tuple(_offset_targets(r, c, ((-1, -1), (-1, 1))) for (r, c) in _SQUARES)
+BLACK_PAWN_ATTACK_TARGETS = tuple(_offset_targets(r, c, ((1, -1), (1, 1))) for (r, c) in _SQUARES)
+
+KNIGHT_ATTACKS_BB = tuple(_mask(t) for t in KNIGHT_TARGETS)
+KING_ATTACKS_BB = tuple(_mask(t) for t in KING_TARGETS)
+SHAMAN_ATTACKS_BB = tuple(_mask(t) for t in SHAMAN_TARGETS)
+ORTHOGONAL_NEIGHBORS_BB = tuple(_mask(t) for t in ORTHOGONAL_NEIGHBORS)
+
+# PAWN_ATTACKS_BB[1][sq] = pedone bianco, PAWN_ATTACKS_BB[0][sq] = pedone nero
+PAWN_ATTACKS_BB = (
+    tuple(_mask(t) for t in BLACK_PAWN_ATTACK_TARGETS),
+    tuple(_mask(t) for t in WHITE_PAWN_ATTACK_TARGETS),
+)
+
+# --------------------------------------------------------------------------
+# Raggi dei pezzi a scorrimento (Torre, Alfiere, Regina, Bisonte).
+#   ROOK_RAYS[sq][i] / BISHOP_RAYS[sq][i] -> caselle (r, c) del raggio i,
+#       dalla più vicina alla più lontana (stesso ordine di direzioni
+#       dei vecchi generatori).
+#   RAY_BB[d][sq] -> raggio nella direzione d (indice in SLIDER_DIRS) come maschera.
+# --------------------------------------------------------------------------
+
+ROOK_DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+SLIDER_DIRS = ROOK_DIRS + DIAGONAL_DIRS
+ROOK_DIR_INDEXES = (0, 1, 2, 3)
+BISHOP_DIR_INDEXES = (4, 5, 6, 7)
+# Passo della direzione in termini di sq: > 0 se il raggio va verso sq crescenti
+DIR_STEP = tuple(dr * BOARD_SIZE + dc for (dr, dc) in SLIDER_DIRS)
+
+def _ray(r, c, dr, dc):
+    out = []
+    rr, cc = r + dr, c + dc
+    while in_bounds(rr, cc):
+        out.append((rr, cc))
+        rr += dr
+        cc += dc
+    return tuple(out)
+
+ROOK_RAYS = tuple(tuple(_ray(r, c, dr, dc) for (dr, dc) in ROOK_DIRS) for (r, c) in _SQUARES)
+BISHOP_RAYS = tuple(tuple(_ray(r, c, dr, dc) for (dr, dc) in DIAGONAL_DIRS) for (r, c) in _SQUARES)
+
+RAY_BB = tuple(
+    tuple(_mask(_ray(r, c, dr, dc)) for (r, c) in _SQUARES)
+    for (dr, dc) in SLIDER_DIRS
+)
+
+def first_blocker(d, sq, occ):
+    """
+    Prima casella occupata lungo il raggio d a partire da sq, oppure -1.
+    Sui raggi "crescenti" è il bit meno significativo, sugli altri il più significativo.
+    """
+    blockers = RAY_BB[d][sq] & occ
+    if not blockers:
+        return -1
+    if DIR_STEP[d] > 0:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+def _blocked_ray_attacks(sq, occ, dir_indexes):
+    # Raggio intero meno la parte oltre il primo pezzo incontrato (incluso nell'attacco)
+    out = 0
+    for d in dir_indexes:
+        ray = RAY_BB[d][sq]
+        b = first_blocker(d, sq, occ)
+        if b >= 0:
+            ray ^= RAY_BB[d][b]
+        out |= ray
+    return out
+
+def _relevant_mask(sq, dir_indexes):
+    # L'ultima casella di ogni raggio non influisce sull'attacco: la escludiamo
+    r, c = _SQUARES[sq]
+    out = 0
+    for d in dir_indexes:
+        ray = _ray(r, c, *SLIDER_DIRS[d])
+        out |= _mask(ray[:-1])
+    return out
+
+def _occupancy_table(sq, mask, dir_indexes):
+    # Tutti i sottoinsiemi di 'mask' (enumerazione "carry-rippler")
+    table = {}
+    sub = 0
+    while True:
+        table[sub] = _blocked_ray_attacks(sq, sub, dir_indexes)
+        sub = (sub - mask) & mask
+        if sub == 0:
+            break
+    return table
+
+# Lookup indicizzato dall'occupazione: ROOK_ATTACKS[sq][occ & ROOK_MASKS[sq]]
+# restituisce in un passo i quattro raggi già troncati al primo pezzo.
+ROOK_MASKS = tuple(_relevant_mask(sq, ROOK_DIR_INDEXES) for sq in range(BOARD_SIZE * BOARD_SIZE))
+BISHOP_MASKS = tuple(_relevant_mask(sq, BISHOP_DIR_INDEXES) for sq in range(BOARD_SIZE * BOARD_SIZE))
+ROOK_ATTACKS = tuple(_occupancy_table(sq, ROOK_MASKS[sq], ROOK_DIR_INDEXES)
+                     for sq in range(BOARD_SIZE * BOARD_SIZE))
+BISHOP_ATTACKS = tuple(_occupancy_table(sq, BISHOP_MASKS[sq], BISHOP_DIR_INDEXES)
+                       for sq in range(BOARD_SIZE * BOARD_SIZE))
+
+# --------------------------------------------------------------------------
+# BETWEEN_BB[a][b] -> caselle strettamente comprese tra a e b se allineate
+# (stessa riga, colonna o diagonale), altrimenti 0. Usata per interposizioni
+# e inchiodature.
+# --------------------------------------------------------------------------
+
+def _between_table():
+    n = BOARD_SIZE * BOARD_SIZE
+    between = [[0] * n for _ in range(n)]
+    for sq in range(n):
+        r, c = _SQUARES[sq]
+        for (dr, dc) in SLIDER_DIRS:
+            acc = 0
+            for (rr, cc) in _ray(r, c, dr, dc):
+                t = rr * BOARD_SIZE + cc
+                between[sq][t] = acc
+                acc |= 1 << t
+    return tuple(tuple(row) for row in between)
+
+BETWEEN_BB = _between_table()
+
+# --------------------------------------------------------------------------
+# "Richiamo dello Sciamano" del Bisonte:
+#   DIAGONALS_BB[sq]  -> le quattro diagonali da sq sulla scacchiera vuota;
+#   RECALL_BB[sq][s]  -> casella subito prima di s sulla diagonale da sq
+#       (0 se s è adiacente a sq o non sta su una sua diagonale).
+# --------------------------------------------------------------------------
+
+DIAGONALS_BB = tuple(
+    RAY_BB[4][sq] | RAY_BB[5][sq] | RAY_BB[6][sq] | RAY_BB[7][sq]
+    for sq in range(BOARD_SIZE * BOARD_SIZE)
+)
+
+def _recall_table():
+    n = BOARD_SIZE * BOARD_SIZE
+    recall = [[0] * n for _ in range(n)]
+    for sq in range(n):
+        for ray in BISHOP_RAYS[sq]:
+            for i in range(1, len(ray)):
+                (r, c) = ray[i]
+                (pr, pc) = ray[i - 1]
+                recall[sq][r * BOARD_SIZE + c] = 1 << (pr * BOARD_SIZE + pc)
+    return tuple(tuple(row) for row in recall)
+
+RECALL_BB = _recall_table()
@@ -0,0 +1,214 @@
+# bitboards.py
+
+from .piece_movement_common import (
+    BOARD_SIZE,
+    EMPTY,
+    WHITE_PAWN, BLACK_PAWN,
+    WHITE_TOTEM, BLACK_TOTEM,
+    WHITE_BISON, BLACK_BISON,
+    WHITE_SHAMAN, BLACK_SHAMAN,
+    WHITE_ROOK, BLACK_ROOK,
+    WHITE_KNIGHT, BLACK_KNIGHT,
+    WHITE_BISHOP, BLACK_BISHOP,
+    WHITE_QUEEN, BLACK_QUEEN,
+    WHITE_KING, BLACK_KING,
+    is_white_piece
+)
+from .attack_tables import (
+    KNIGHT_ATTACKS_BB, KING_ATTACKS_BB, SHAMAN_ATTACKS_BB, PAWN_ATTACKS_BB,
+    ROOK_ATTACKS, ROOK_MASKS, BISHOP_ATTACKS, BISHOP_MASKS,
+    DIAGONALS_BB, RECALL_BB
+)
+
+# --------------------------------------------------------------------------
+# Convenzioni: casella sq = r * 8 + c, bit corrispondente = 1 << sq.
+# Il bit 0 è a8 (riga 0, colonna 0), il bit 63 è h1 (riga 7, colonna 7).
+# "Nord" = riga - 1 (verso i Neri), "Est" = colonna + 1.
+# --------------------------------------------------------------------------
+
+FULL_BB = (1 << 64) - 1
+
+FILE_BB = [sum(1 << (r * BOARD_SIZE + c) for r in range(BOARD_SIZE)) for c in range(BOARD_SIZE)]
+RANK_BB = [0xFF << (r * BOARD_SIZE) for r in range(BOARD_SIZE)]
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(bb):
+        return bin(bb).count("1")
+
+def square_bb(r, c):
+    return 1 << (r * BOARD_SIZE + c)
+
+def lsb_square(bb):
+    """Indice della casella meno significativa di bb (bb deve essere != 0)."""
+    return (bb & -bb).bit_length() - 1
+
+def squares_of(bb):
+    """Lista delle caselle (sq) presenti in bb, in ordine crescente."""
+    out = []
+    while bb:
+        low = bb & -bb
+        out.append(low.bit_length() - 1)
+        bb ^= low
+    return out
+
+# --------------------------------------------------------------------------
+# Shift di un passo verso Nord / Sud (spinte dei pedoni)
+# --------------------------------------------------------------------------
+def shift_n(bb):
+    return bb >> 8
+
+def shift_s(bb):
+    return (bb << 8) & FULL_BB
+
+# --------------------------------------------------------------------------
+# Maschere di attacco per pezzo. I pezzi a salto (Cavallo, Re, Totem, Sciamano,
+# Pedone) usano le tabelle di attack_tables; i pezzi a scorrimento usano il
+# lookup indicizzato dall'occupazione (un accesso per Torre/Bisonte o Alfiere).
+# --------------------------------------------------------------------------
+def rook_attacks_bb(sq, occ):
+    return ROOK_ATTACKS[sq][occ & ROOK_MASKS[sq]]
+
+def bishop_attacks_bb(sq, occ):
+    return BISHOP_ATTACKS[sq][occ & BISHOP_MASKS[sq]]
+
+def queen_attacks_bb(sq, occ):
+    return ROOK_ATTACKS[sq][occ & ROOK_MASKS[sq]] | BISHOP_ATTACKS[sq][occ & BISHOP_MASKS[sq]]
+
+def inherited_attacks_bb(sq, occ, power_str):
+    """Attacchi di un potere ereditato dal Totem (stessa geometria di piece_attacks)."""
+    if power_str == "ROOK" or power_str == "BISON":
+        return rook_attacks_bb(sq, occ)
+    elif power_str == "BISHOP":
+        return bishop_attacks_bb(sq, occ)
+    elif power_str == "KNIGHT":
+        return KNIGHT_ATTACKS_BB[sq]
+    elif power_str == "SHAMAN":
+        return SHAMAN_ATTACKS_BB[sq]
+    elif power_str == "KING" or power_str == "TOTEM":
+        return KING_ATTACKS_BB[sq]
+    return 0
+
+def piece_attacks_bb(board_obj, sq, piece, occ):
+    """
+    Maschera delle caselle attaccate dal pezzo 'piece' in sq, con occupazione occ.
+    Equivale a piece_attacks._get_pseudo_attacks_of_piece, TOTEM ereditato incluso.
+    """
+    if piece == WHITE_PAWN:
+        return PAWN_ATTACKS_BB[1][sq]
+    elif piece == BLACK_PAWN:
+        return PAWN_ATTACKS_BB[0][sq]
+    elif piece in (WHITE_KNIGHT, BLACK_KNIGHT):
+        return KNIGHT_ATTACKS_BB[sq]
+    elif piece in (WHITE_BISHOP, BLACK_BISHOP):
+        return bishop_attacks_bb(sq, occ)
+    elif piece in (WHITE_ROOK, BLACK_ROOK, WHITE_BISON, BLACK_BISON):
+        return rook_attacks_bb(sq, occ)
+    elif piece in (WHITE_QUEEN, BLACK_QUEEN):
+        return queen_attacks_bb(sq, occ)
+    elif piece in (WHITE_SHAMAN, BLACK_SHAMAN):
+        return SHAMAN_ATTACKS_BB[sq]
+    elif piece in (WHITE_KING, BLACK_KING):
+        return KING_ATTACKS_BB[sq]
+    elif piece in (WHITE_TOTEM, BLACK_TOTEM):
+        if is_white_piece(piece):
+            inherited = board_obj.white_totem_inherited
+        else:
+            inherited = board_obj.black_totem_inherited
+        out = KING_ATTACKS_BB[sq]
+        if inherited is not None:
+            out |= inherited_attacks_bb(sq, occ, inherited)
+        return out
+    return 0
+
+# --------------------------------------------------------------------------
+# Mosse pseudo-legali (stesse regole di classic/native_piece_movement)
+# --------------------------------------------------------------------------
+def bison_recall_bb(sq, occ, own_shaman_bb):
+    """
+    "Richiamo dello Sciamano": per ogni diagonale, se il primo pezzo incontrato
+    è uno Sciamano amico non adiacente, la casella subito prima è raggiungibile.
+    Gli Sciamani "primi pezzi" vengono dal lookup dell'Alfiere (che dipende solo
+    dall'occupazione delle diagonali) e la casella d'arrivo da RECALL_BB.
+    """
+    if not (DIAGONALS_BB[sq] & own_shaman_bb):
+        return 0
+    shamans = bishop_attacks_bb(sq, occ) & own_shaman_bb
+    out = 0
+    while shamans:
+        low = shamans & -shamans
+        shamans ^= low
+        out |= RECALL_BB[sq][low.bit_length() - 1]
+    return out
+
+def pawn_moves_bb(sq, white, own, enemy, enemy_bison):
+    """
+    Spinte (singola e doppia dalla riga iniziale) e catture diagonali.
+    Il pedone non può catturare il Bisonte, tranne quando promuove.
+    """
+    bit = 1 << sq
+    occ = own | enemy
+    if white:
+        single = shift_n(bit) & ~occ
+        out = single
+        if bit & RANK_BB[6] and single:
+            out |= shift_n(single) & ~occ
+        caps = PAWN_ATTACKS_BB[1][sq] & enemy
+        if not (bit & RANK_BB[1]):
+            caps &= ~enemy_bison
+    else:
+        single = shift_s(bit) & ~occ
+        out = single
+        if bit & RANK_BB[1] and single:
+            out |= shift_s(single) & ~occ
+        caps = PAWN_ATTACKS_BB[0][sq] & enemy
+        if not (bit & RANK_BB[6]):
+            caps &= ~enemy_bison
+    return out | caps
+
+def bison_push_ok(board_obj, sq, target_sq):
+    """
+    Il Bisonte che cattura un pedone lo spinge di una casella lungo la sua
+    direzione: la mossa è possibile solo se quella casella esiste ed è vuota.
+    """
+    fr, fc = divmod(sq, BOARD_SIZE)
+    tr, tc = divmod(target_sq, BOARD_SIZE)
+    dr = (tr > fr) - (tr < fr)
+    dc = (tc > fc) - (tc < fc)
+    pr = tr + dr
+    pc = tc + dc
+    return 0 <= pr < BOARD_SIZE and 0 <= pc < BOARD_SIZE and board_obj.board[pr][pc] == EMPTY
+
+def piece_targets_bb(board_obj, sq, piece, own, enemy):
+    """
+    Maschera delle caselle d'arrivo pseudo-legali del pezzo in sq, già filtrata
+    dalle mosse che make_move_in_place rifiuterebbe (casella amica, pedone
+    che cattura il Bisonte, spinta del Bisonte impossibile). Arrocco e
+    congelamento dello Sciamano sono gestiti a parte.
+    """
+    occ = own | enemy
+    white = is_white_piece(piece)
+    if piece == WHITE_PAWN or piece == BLACK_PAWN:
+        enemy_bison = board_obj.piece_bb[BLACK_BISON if white else WHITE_BISON]
+        return pawn_moves_bb(sq, white, own, enemy, enemy_bison)
+    elif piece == WHITE_BISON or piece == BLACK_BISON:
+        targets = rook_attacks_bb(sq, occ) & ~own
+        enemy_pawns = targets & board_obj.piece_bb[BLACK_PAWN if white else WHITE_PAWN]
+        while enemy_pawns:
+            low = enemy_pawns & -enemy_pawns
+            enemy_pawns ^= low
+            if not bison_push_ok(board_obj, sq, low.bit_length() - 1):
+                targets ^= low
+        own_shaman = board_obj.piece_bb[WHITE_SHAMAN if white else BLACK_SHAMAN]
+        return targets | bison_recall_bb(sq, occ, own_shaman)
+    elif piece == WHITE_TOTEM or piece == BLACK_TOTEM:
+        inherited = board_obj.white_totem_inherited if white else board_obj.black_totem_inherited
+        targets = KING_ATTACKS_BB[sq]
+        if inherited is not None:
+            targets |= inherited_attacks_bb(sq, occ, inherited)
+            if inherited == "BISON":
+                own_shaman = board_obj.piece_bb[WHITE_SHAMAN if white else BLACK_SHAMAN]
+                targets |= bison_recall_bb(sq, occ, own_shaman)
+        return targets & ~own
+    return piece_attacks_bb(board_obj, sq, piece, occ) & ~own
@@ -12,6 +12,10 @@ from .piece_movement_common import (
     is_white_piece, is_black_piece,
     in_bounds
 )
+from .attack_tables import (
+    KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS,
+    WHITE_PAWN_ATTACK_TARGETS, BLACK_PAWN_ATTACK_TARGETS
+)
 
 def get_pawn_moves(board, r, c):
     p = board[r][c]
@@ -31,69 +35,45 @@ def get_pawn_moves(board, r, c):
             if board[2][c] == EMPTY and board[3][c] == EMPTY:
                 moves.append((3, c))
 
-    # catture diagonali pedone
-    for dc in [-1, 1]:
-        cc = c + dc
-        if in_bounds(fr, cc):
-            occ = board[fr][cc]
-            if occ != EMPTY:
-                # controlla se è avversario
-                if is_white_piece(p) != is_white_piece(occ):
-                    moves.append((fr, cc))
+    # catture diagonali pedone (caselle precalcolate)
+    attack_targets = WHITE_PAWN_ATTACK_TARGETS if pIsWhite else BLACK_PAWN_ATTACK_TARGETS
+    for (rr, cc) in attack_targets[r * BOARD_SIZE + c]:
+        occ = board[rr][cc]
+        if occ != EMPTY:
+            # controlla se è avversario
+            if pIsWhite != is_white_piece(occ):
+                moves.append((rr, cc))
 
     return moves
 
-def get_rook_moves(board, r, c):
-    p = board[r][c]
+def _slider_moves(board, r, c, rays):
+    p_white = is_white_piece(board[r][c])
     out = []
-    dirs = [(1,0), (-1,0), (0,1), (0,-1)]
-    for (dr, dc) in dirs:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
+    for ray in rays[r * BOARD_SIZE + c]:
+        for (rr, cc) in ray:
             occ = board[rr][cc]
             if occ == EMPTY:
                 out.append((rr, cc))
             else:
-                if is_white_piece(p) != is_white_piece(occ):
+                if p_white != is_white_piece(occ):
                     out.append((rr, cc))
                 break
     return out
 
+def get_rook_moves(board, r, c):
+    return _slider_moves(board, r, c, ROOK_RAYS)
+
 def get_knight_moves(board, r, c):
-    p = board[r][c]
+    p_white = is_white_piece(board[r][c])
     out = []
-    steps = [(-2,-1), (-2,1), (2,-1), (2,1), (1,-2), (1,2), (-1,-2), (-1,2)]
-    for (dr, dc) in steps:
-        rr, cc = r+dr, c+dc
-        if in_bounds(rr, cc):
-            occ = board[rr][cc]
-            if occ == EMPTY or is_white_piece(p) != is_white_piece(occ):
-                out.append((rr, cc))
+    for (rr, cc) in KNIGHT_TARGETS[r * BOARD_SIZE + c]:
+        occ = board[rr][cc]
+        if occ == EMPTY or p_white != is_white_piece(occ):
+            out.append((rr, cc))
     return out
 
 def get_bishop_moves(board, r, c):
-    p = board[r][c]
-    out = []
-    dirs = [(1,1), (1,-1), (-1,1), (-1,-1)]
-    for (dr, dc) in dirs:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
-            occ = board[rr][cc]
-            if occ == EMPTY:
-                out.append((rr, cc))
-            else:
-                if is_white_piece(p) != is_white_piece(occ):
-                    out.append((rr, cc))
-                break
-    return out
+    return _slider_moves(board, r, c, BISHOP_RAYS)
 
 def get_queen_moves(board, r, c):
     # La Regina (Queen) combina i movimenti di Rook e Bishop
@@ -102,15 +82,10 @@ def get_queen_moves(board, r, c):
     return rook_part + bishop_part
 
 def get_king_moves(board, r, c):
-    p = board[r][c]
+    p_white = is_white_piece(board[r][c])
     out = []
-    for dr in [-1, 0, 1]:
-        for dc in [-1, 0, 1]:
-            if dr == 0 and dc == 0:
-                continue
-            rr, cc = r+dr, c+dc
-            if in_bounds(rr, cc):
-                occ = board[rr][cc]
-                if occ == EMPTY or is_white_piece(p) != is_white_piece(occ):
-                    out.append((rr, cc))
+    for (rr, cc) in KING_TARGETS[r * BOARD_SIZE + c]:
+        occ = board[rr][cc]
+        if occ == EMPTY or p_white != is_white_piece(occ):
+            out.append((rr, cc))
     return out
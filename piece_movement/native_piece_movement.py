@@ -6,9 +6,9 @@ from .piece_movement_common import (
     WHITE_TOTEM, BLACK_TOTEM,
     WHITE_BISON, BLACK_BISON,
     WHITE_SHAMAN, BLACK_SHAMAN,
-    is_white_piece, is_black_piece,
-    in_bounds
+    is_white_piece, is_black_piece
 )
+from .attack_tables import KING_TARGETS, SHAMAN_TARGETS, ROOK_RAYS, BISHOP_RAYS
 
 def get_totem_moves(board, r, c):
     """
@@ -16,20 +16,15 @@ def get_totem_moves(board, r, c):
       - Si MUOVE di 1 passo in qualsiasi direzione
       - (RIMOSSA la cattura a distanza 3)
     """
-    p = board[r][c]
+    p_white = is_white_piece(board[r][c])
     moves = []
 
     # (1) Spostamento/cattura a una sola casella di distanza, stile Re
-    for dr in [-1, 0, 1]:
-        for dc in [-1, 0, 1]:
-            if dr == 0 and dc == 0:
-                continue
-            rr, cc = r + dr, c + dc
-            if in_bounds(rr, cc):
-                occ = board[rr][cc]
-                # se casella vuota o c'è un pezzo avversario => si può muovere/catturare
-                if occ == EMPTY or is_white_piece(p) != is_white_piece(occ):
-                    moves.append((rr, cc))
+    for (rr, cc) in KING_TARGETS[r * BOARD_SIZE + c]:
+        occ = board[rr][cc]
+        # se casella vuota o c'è un pezzo avversario => si può muovere/catturare
+        if occ == EMPTY or p_white != is_white_piece(occ):
+            moves.append((rr, cc))
 
     return moves
 
@@ -45,48 +40,28 @@ def get_bison_moves(board, r, c):
     """
     p = board[r][c]
     out = []
+    sq = r * BOARD_SIZE + c
 
     # (1) Movimenti base (stile Rook), come prima
-    dirs_rook = [(1,0), (-1,0), (0,1), (0,-1)]
-    for (dr, dc) in dirs_rook:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
+    for ray in ROOK_RAYS[sq]:
+        for (rr, cc) in ray:
             out.append((rr, cc))
             if board[rr][cc] != EMPTY:
                 break
 
     # (2) Richiamo dello Sciamano
-    my_is_white = is_white_piece(p)
-    dirs_diag = [(1,1), (1,-1), (-1,1), (-1,-1)]
-    for (dr, dc) in dirs_diag:
-        rr, cc = r, c
-        found_shaman_same_color = False
-        path_clear = True
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
+    my_shaman = WHITE_SHAMAN if is_white_piece(p) else BLACK_SHAMAN
+    for ray in BISHOP_RAYS[sq]:
+        prev = None
+        for (rr, cc) in ray:
             occupant = board[rr][cc]
             if occupant != EMPTY:
-                if (my_is_white and occupant == WHITE_SHAMAN) or ((not my_is_white) and occupant == BLACK_SHAMAN):
-                    found_shaman_same_color = True
-                else:
-                    path_clear = False
+                # Vogliamo la casella appena prima dello Sciamano amico
+                # (vuota per costruzione, purché non sia quella del Bisonte)
+                if occupant == my_shaman and prev is not None:
+                    out.append(prev)
                 break
-
-        if found_shaman_same_color and path_clear:
-            # Vogliamo la casella appena prima dello Sciamano
-            prev_r = rr - dr
-            prev_c = cc - dc
-            if in_bounds(prev_r, prev_c):
-                # Niente catture: dev'essere vuota
-                if board[prev_r][prev_c] == EMPTY:
-                    out.append((prev_r, prev_c))
+            prev = (rr, cc)
 
     return out
 
@@ -96,27 +71,11 @@ def get_shaman_moves(board, r, c):
     Shaman: max due caselle in diagonale. Se la prima è vuota, “salta” alla seconda.
     La cattura funziona come un Bishop "corto".
     """
-    p = board[r][c]
+    p_white = is_white_piece(board[r][c])
     out = []
-    dirs = [(1,1), (1,-1), (-1,1), (-1,-1)]
-    for (dr, dc) in dirs:
-        r1, c1 = r+dr, c+dc
-        if in_bounds(r1, c1):
-            occ1 = board[r1][c1]
-            # primo passo
-            if occ1 == EMPTY or is_white_piece(p) != is_white_piece(occ1):
-                out.append((r1, c1))
-
-            # secondo passo
-            r2, c2 = r1+dr, c1+dc
-            if in_bounds(r2, c2):
-                occ2 = board[r2][c2]
-                # se la prima era vuota, salti direttamente alla seconda
-                if occ1 == EMPTY:
-                    if occ2 == EMPTY or is_white_piece(p) != is_white_piece(occ2):
-                        out.append((r2, c2))
-                else:
-                    # se la prima era occupata, puoi comunque colpire la seconda?
-                    if occ2 == EMPTY or is_white_piece(p) != is_white_piece(occ2):
-                        out.append((r2, c2))
+    # Primo passo e salto al secondo (anche se il primo è occupato), precalcolati
+    for (rr, cc) in SHAMAN_TARGETS[r * BOARD_SIZE + c]:
+        occ = board[rr][cc]
+        if occ == EMPTY or p_white != is_white_piece(occ):
+            out.append((rr, cc))
     return out
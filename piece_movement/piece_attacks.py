@@ -12,39 +12,195 @@ from .piece_movement_common import (
     WHITE_BISHOP, BLACK_BISHOP,
     WHITE_QUEEN, BLACK_QUEEN,
     WHITE_KING, BLACK_KING,
-    is_white_piece, is_black_piece,
-    in_bounds
+    is_white_piece
 )
+from .bitboards import rook_attacks_bb, bishop_attacks_bb
+from .attack_tables import (
+    KNIGHT_TARGETS, KING_TARGETS, SHAMAN_TARGETS, ROOK_RAYS, BISHOP_RAYS,
+    WHITE_PAWN_ATTACK_TARGETS, BLACK_PAWN_ATTACK_TARGETS,
+    KNIGHT_ATTACKS_BB, KING_ATTACKS_BB, SHAMAN_ATTACKS_BB, PAWN_ATTACKS_BB
+)
+
+# Pezzi che attaccano lungo i raggi, per colore dell'attaccante (True = Bianco).
+# Il Totem vi si aggiunge solo se ha ereditato il potere corrispondente.
+_ORTHOGONAL_SLIDERS = {
+    True: (WHITE_ROOK, WHITE_QUEEN, WHITE_BISON),
+    False: (BLACK_ROOK, BLACK_QUEEN, BLACK_BISON),
+}
+_DIAGONAL_SLIDERS = {
+    True: (WHITE_BISHOP, WHITE_QUEEN),
+    False: (BLACK_BISHOP, BLACK_QUEEN),
+}
 
 # (MODIFICA QUI) - adesso 'is_square_attacked' riceve 'board_obj'
 def is_square_attacked(board_obj, row, col, by_white):
     """
     Ritorna True se la casella (row, col) è attaccata 
     da un pezzo del colore specificato (by_white).
+
+    Invece di generare gli attacchi di ogni pezzo avversario, si parte dalla
+    casella e si guarda "all'indietro" con la geometria di ciascun pezzo
+    (salti, anello del Re, diagonali del pedone e dello Sciamano, raggi fino
+    al primo pezzo), uscendo al primo attaccante trovato.
+    """
+    if board_obj.use_bitboards:
+        return _is_square_attacked_bb(board_obj, row, col, by_white)
+
+    bstate = board_obj.board
+    sq = row * BOARD_SIZE + col
+
+    if by_white:
+        knight, king, totem, shaman, pawn = WHITE_KNIGHT, WHITE_KING, WHITE_TOTEM, WHITE_SHAMAN, WHITE_PAWN
+        inherited = board_obj.white_totem_inherited
+        # Un pedone bianco attacca verso l'alto: lo si cerca sotto la casella
+        pawn_sources = BLACK_PAWN_ATTACK_TARGETS[sq]
+    else:
+        knight, king, totem, shaman, pawn = BLACK_KNIGHT, BLACK_KING, BLACK_TOTEM, BLACK_SHAMAN, BLACK_PAWN
+        inherited = board_obj.black_totem_inherited
+        pawn_sources = WHITE_PAWN_ATTACK_TARGETS[sq]
+
+    # Anello attorno alla casella: Re e Totem (che muove sempre "King-like")
+    for (rr, cc) in KING_TARGETS[sq]:
+        p = bstate[rr][cc]
+        if p == king or p == totem:
+            return True
+
+    for (rr, cc) in pawn_sources:
+        if bstate[rr][cc] == pawn:
+            return True
+
+    knight_like = (knight, totem) if inherited == "KNIGHT" else (knight,)
+    for (rr, cc) in KNIGHT_TARGETS[sq]:
+        if bstate[rr][cc] in knight_like:
+            return True
+
+    # La geometria dello Sciamano (1 o 2 passi in diagonale, con salto) è simmetrica
+    shaman_like = (shaman, totem) if inherited == "SHAMAN" else (shaman,)
+    for (rr, cc) in SHAMAN_TARGETS[sq]:
+        if bstate[rr][cc] in shaman_like:
+            return True
+
+    orthogonal = _ORTHOGONAL_SLIDERS[by_white]
+    if inherited == "ROOK" or inherited == "BISON":
+        orthogonal = orthogonal + (totem,)
+    for ray in ROOK_RAYS[sq]:
+        for (rr, cc) in ray:
+            p = bstate[rr][cc]
+            if p != EMPTY:
+                if p in orthogonal:
+                    return True
+                break
+
+    diagonal = _DIAGONAL_SLIDERS[by_white]
+    if inherited == "BISHOP":
+        diagonal = diagonal + (totem,)
+    for ray in BISHOP_RAYS[sq]:
+        for (rr, cc) in ray:
+            p = bstate[rr][cc]
+            if p != EMPTY:
+                if p in diagonal:
+                    return True
+                break
+
+    return False
+
+def _is_square_attacked_bb(board_obj, row, col, by_white):
+    """
+    Variante bitboard dello stesso sondaggio inverso: la maschera d'attacco
+    di ogni geometria, calcolata dalla casella bersaglio, viene intersecata
+    con i pezzi avversari che la possiedono.
     """
-    bstate = board_obj.board  # estraiamo la matrice di caselle
-
-    for rr in range(BOARD_SIZE):
-        for cc in range(BOARD_SIZE):
-            piece = bstate[rr][cc]
-            if piece == EMPTY:
-                continue
-            # Se stiamo verificando 'by_white=True', allora 
-            # consideriamo solo i pezzi bianchi, e viceversa
-            if by_white:
-                if not is_white_piece(piece):
-                    continue
-            else:
-                if not is_black_piece(piece):
-                    continue
-
-            # (MODIFICA QUI) - richiamiamo la nuova funzione 
-            # _get_pseudo_attacks_of_piece(board_obj, rr, cc)
-            attacks = _get_pseudo_attacks_of_piece(board_obj, rr, cc)
-            if (row, col) in attacks:
-                return True
+    sq = row * BOARD_SIZE + col
+    bb = board_obj.piece_bb
+    if by_white:
+        knights, kings, totems, shamans = bb[WHITE_KNIGHT], bb[WHITE_KING], bb[WHITE_TOTEM], bb[WHITE_SHAMAN]
+        if PAWN_ATTACKS_BB[0][sq] & bb[WHITE_PAWN]:
+            return True
+        orthogonal = bb[WHITE_ROOK] | bb[WHITE_QUEEN] | bb[WHITE_BISON]
+        diagonal = bb[WHITE_BISHOP] | bb[WHITE_QUEEN]
+        inherited = board_obj.white_totem_inherited
+    else:
+        knights, kings, totems, shamans = bb[BLACK_KNIGHT], bb[BLACK_KING], bb[BLACK_TOTEM], bb[BLACK_SHAMAN]
+        if PAWN_ATTACKS_BB[1][sq] & bb[BLACK_PAWN]:
+            return True
+        orthogonal = bb[BLACK_ROOK] | bb[BLACK_QUEEN] | bb[BLACK_BISON]
+        diagonal = bb[BLACK_BISHOP] | bb[BLACK_QUEEN]
+        inherited = board_obj.black_totem_inherited
+
+    if totems and inherited is not None:
+        if inherited == "KNIGHT":
+            knights |= totems
+        elif inherited == "SHAMAN":
+            shamans |= totems
+        elif inherited == "ROOK" or inherited == "BISON":
+            orthogonal |= totems
+        elif inherited == "BISHOP":
+            diagonal |= totems
+
+    if KING_ATTACKS_BB[sq] & (kings | totems):
+        return True
+    if KNIGHT_ATTACKS_BB[sq] & knights:
+        return True
+    if SHAMAN_ATTACKS_BB[sq] & shamans:
+        return True
+    occ = board_obj.white_bb | board_obj.black_bb
+    if orthogonal and rook_attacks_bb(sq, occ) & orthogonal:
+        return True
+    if diagonal and bishop_attacks_bb(sq, occ) & diagonal:
+        return True
     return False
 
+def slider_attackers_bb(board_obj, by_white):
+    """
+    (ortogonali, diagonali): maschere dei pezzi del colore by_white che
+    attaccano lungo i raggi, Totem incluso se ha ereditato Torre/Bisonte o Alfiere.
+    """
+    bb = board_obj.piece_bb
+    if by_white:
+        orthogonal = bb[WHITE_ROOK] | bb[WHITE_QUEEN] | bb[WHITE_BISON]
+        diagonal = bb[WHITE_BISHOP] | bb[WHITE_QUEEN]
+        totems = bb[WHITE_TOTEM]
+        inherited = board_obj.white_totem_inherited
+    else:
+        orthogonal = bb[BLACK_ROOK] | bb[BLACK_QUEEN] | bb[BLACK_BISON]
+        diagonal = bb[BLACK_BISHOP] | bb[BLACK_QUEEN]
+        totems = bb[BLACK_TOTEM]
+        inherited = board_obj.black_totem_inherited
+    if inherited == "ROOK" or inherited == "BISON":
+        orthogonal |= totems
+    elif inherited == "BISHOP":
+        diagonal |= totems
+    return orthogonal, diagonal
+
+def attackers_to_bb(board_obj, sq, by_white, occ):
+    """
+    Maschera di tutti i pezzi del colore by_white che attaccano la casella sq
+    con occupazione occ (stessa geometria di is_square_attacked).
+    """
+    bb = board_obj.piece_bb
+    if by_white:
+        knights, kings, totems, shamans = bb[WHITE_KNIGHT], bb[WHITE_KING], bb[WHITE_TOTEM], bb[WHITE_SHAMAN]
+        out = PAWN_ATTACKS_BB[0][sq] & bb[WHITE_PAWN]
+        inherited = board_obj.white_totem_inherited
+    else:
+        knights, kings, totems, shamans = bb[BLACK_KNIGHT], bb[BLACK_KING], bb[BLACK_TOTEM], bb[BLACK_SHAMAN]
+        out = PAWN_ATTACKS_BB[1][sq] & bb[BLACK_PAWN]
+        inherited = board_obj.black_totem_inherited
+    if inherited == "KNIGHT":
+        knights |= totems
+    elif inherited == "SHAMAN":
+        shamans |= totems
+
+    out |= KING_ATTACKS_BB[sq] & (kings | totems)
+    out |= KNIGHT_ATTACKS_BB[sq] & knights
+    out |= SHAMAN_ATTACKS_BB[sq] & shamans
+    orthogonal, diagonal = slider_attackers_bb(board_obj, by_white)
+    if orthogonal:
+        out |= rook_attacks_bb(sq, occ) & orthogonal
+    if diagonal:
+        out |= bishop_attacks_bb(sq, occ) & diagonal
+    return out
+
 # (MODIFICA QUI) - anche '_get_pseudo_attacks_of_piece' ora riceve 'board_obj'
 def _get_pseudo_attacks_of_piece(board_obj, r, c):
     """
@@ -77,124 +233,65 @@ def _get_pseudo_attacks_of_piece(board_obj, r, c):
 
     return []
 
-def _pseudo_bison_attacks(board_obj, r, c):
+def _pseudo_ray_attacks(board_obj, r, c, rays):
     """
-    Il Bisonte "attacca" come una Torre estesa (scorre in 4 direzioni
-    e si ferma appena incontra un pezzo).
+    Scorre i raggi precalcolati della casella fino al primo pezzo (incluso).
     """
     bstate = board_obj.board
     out = []
-    directions = [(1,0), (-1,0), (0,1), (0,-1)]
-    for (dr, dc) in directions:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
+    for ray in rays[r * BOARD_SIZE + c]:
+        for (rr, cc) in ray:
             out.append((rr, cc))
             if bstate[rr][cc] != EMPTY:
                 break
     return out
 
+def _pseudo_bison_attacks(board_obj, r, c):
+    """
+    Il Bisonte "attacca" come una Torre estesa (scorre in 4 direzioni
+    e si ferma appena incontra un pezzo).
+    """
+    return _pseudo_ray_attacks(board_obj, r, c, ROOK_RAYS)
+
 def _pseudo_pawn_attacks(board_obj, r, c):
     """
     Un pedone 'attacca' solo in diagonale avanti (1 passo).
     """
-    bstate = board_obj.board
-    p = bstate[r][c]
-    pIsWhite = is_white_piece(p)
-    direction = -1 if pIsWhite else 1
-    rr = r + direction
-    out = []
-    for dc in [-1, 1]:
-        cc = c + dc
-        if in_bounds(rr, cc):
-            out.append((rr, cc))
-    return out
+    if is_white_piece(board_obj.board[r][c]):
+        return WHITE_PAWN_ATTACK_TARGETS[r * BOARD_SIZE + c]
+    return BLACK_PAWN_ATTACK_TARGETS[r * BOARD_SIZE + c]
 
 def _pseudo_rook_attacks(board_obj, r, c):
     """
     Una Torre attacca scorrendo in orizzontale/verticale
     finché non incontra un pezzo o il bordo.
     """
-    bstate = board_obj.board
-    out = []
-    dirs = [(1,0), (-1,0), (0,1), (0,-1)]
-    for (dr, dc) in dirs:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
-            out.append((rr, cc))
-            if bstate[rr][cc] != EMPTY:
-                break
-    return out
+    return _pseudo_ray_attacks(board_obj, r, c, ROOK_RAYS)
 
 def _pseudo_knight_attacks(board_obj, r, c):
     """
     Un Cavallo attacca le 8 posizioni a L.
     """
-    out = []
-    steps = [(-2,-1), (-2,1), (2,-1), (2,1), (1,-2), (1,2), (-1,-2), (-1,2)]
-    for (dr, dc) in steps:
-        rr, cc = r+dr, c+dc
-        if in_bounds(rr, cc):
-            out.append((rr, cc))
-    return out
+    return KNIGHT_TARGETS[r * BOARD_SIZE + c]
 
 def _pseudo_bishop_attacks(board_obj, r, c):
     """
     Un Alfiere attacca scorrendo in diagonale 
     finché non incontra un pezzo o il bordo.
     """
-    bstate = board_obj.board
-    out = []
-    dirs = [(1,1), (1,-1), (-1,1), (-1,-1)]
-    for (dr, dc) in dirs:
-        rr, cc = r, c
-        while True:
-            rr += dr
-            cc += dc
-            if not in_bounds(rr, cc):
-                break
-            out.append((rr, cc))
-            if bstate[rr][cc] != EMPTY:
-                break
-    return out
+    return _pseudo_ray_attacks(board_obj, r, c, BISHOP_RAYS)
 
 def _pseudo_shaman_attacks(board_obj, r, c):
     """
     Lo Sciamano (base) attacca max 2 caselle in diagonale.
     """
-    bstate = board_obj.board
-    out = []
-    dirs = [(1,1), (1,-1), (-1,1), (-1,-1)]
-    for (dr, dc) in dirs:
-        r1, c1 = r+dr, c+dc
-        if in_bounds(r1, c1):
-            out.append((r1, c1))
-            r2, c2 = r1+dr, c1+dc
-            if in_bounds(r2, c2):
-                out.append((r2, c2))
-    return out
+    return SHAMAN_TARGETS[r * BOARD_SIZE + c]
 
 def _pseudo_king_attacks(board_obj, r, c):
     """
     Il Re attacca le 8 posizioni adiacenti.
     """
-    out = []
-    for dr in [-1,0,1]:
-        for dc in [-1,0,1]:
-            if dr == 0 and dc == 0:
-                continue
-            rr = r + dr
-            cc = c + dc
-            if in_bounds(rr, cc):
-                out.append((rr, cc))
-    return out
+    return KING_TARGETS[r * BOARD_SIZE + c]
 
 # (MODIFICA QUI) - TOTEM deve includere anche gli attacchi ereditati
 def _pseudo_totem_attacks(board_obj, r, c):
@@ -205,17 +302,9 @@ def _pseudo_totem_attacks(board_obj, r, c):
     """
     bstate = board_obj.board
     piece = bstate[r][c]
-    out = []
 
-    # 1) Attacchi base (King-like)
-    for dr in [-1,0,1]:
-        for dc in [-1,0,1]:
-            if dr==0 and dc==0:
-                continue
-            rr = r + dr
-            cc = c + dc
-            if in_bounds(rr, cc):
-                out.append((rr, cc))
+    # 1) Attacchi base (King-like), dalla tabella precalcolata
+    out = list(KING_TARGETS[r * BOARD_SIZE + c])
 
     # 2) Se TOTEM ha ereditato un potere (BISHOP, ROOK, KNIGHT, etc.), 
     #    aggiungiamo anche quegli attacchi
@@ -44,6 +44,20 @@ PIECE_NAME_MAP = {
     BLACK_KING:    "BLACK_KING",
 }
 
+# Valori base del materiale: usati dalla valutazione e dall'ordinamento
+# MVV-LVA delle catture
+PIECE_VALUE = {
+    WHITE_PAWN: 1,   BLACK_PAWN: 1,
+    WHITE_KNIGHT: 3, BLACK_KNIGHT: 3,
+    WHITE_BISHOP: 3, BLACK_BISHOP: 3,
+    WHITE_SHAMAN: 3, BLACK_SHAMAN: 3,
+    WHITE_BISON: 4,  BLACK_BISON: 4,
+    WHITE_ROOK: 5,   BLACK_ROOK: 5,
+    WHITE_TOTEM: 4,  BLACK_TOTEM: 4,
+    WHITE_QUEEN: 9,  BLACK_QUEEN: 9,
+    WHITE_KING: 999, BLACK_KING: 999
+}
+
 def is_white_piece(p):
     return (p != EMPTY) and ((p & 1) == 1)
 
@@ -111,7 +125,7 @@ def get_inherited_moves_basic(board, r, c, piece_class: str):
         # potremmo ridurlo a get_rook_moves. Oppure usiamo get_bison_moves
         # se vogliamo la parte di diagonale? 
         # Per non perdere del tutto la "forma" bison, useremo get_bison_moves,
-        # ma occhio che in 'moves.py' la push si realizza in _apply_bison_move.
+        # ma occhio che in 'moves.py' la push si realizza in _apply_normal_move.
         # In questa sede, restituisce la geometria (Rook + eventuale diagonale).
         # Non scatena freeze, né logiche extra. Va bene.
         return get_bison_moves(board, r, c)